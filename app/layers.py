@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional, Sequence
 import geopandas as gpd
 import pandas as pd
 import osmnx as ox
@@ -15,7 +15,7 @@ class ExtractedLayers:
     waterways: Optional[gpd.GeoDataFrame]
     landuse: Dict[str, gpd.GeoDataFrame]
 
-def extract_layers(osm_bundle: Dict[str, Any], wanted_amenities: List[str], wanted_pois: List[str]) -> ExtractedLayers:
+def extract_layers(osm_bundle: Dict[str, Any], wanted_amenities: Sequence[str], wanted_pois: Sequence[str]) -> ExtractedLayers:
     """Split raw OSM data into logical layers.
 
     - Roads: edges GeoDataFrame from the road graph (drive network)
@@ -163,12 +163,9 @@ Ready to start!
             lat = float(node.get('lat'))
             lon = float(node.get('lon'))
             
-            tags = {}
-            for tag in node.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
+            tags = {key: value
+                    for key, value in ((child.get('k'), child.get('v')) for child in node if child.tag == 'tag')
+                    if key and value}
             
             data['nodes'][node_id] = {
                 'lat': lat,
@@ -184,18 +181,16 @@ Ready to start!
             
             # Get nodes
             nodes = []
-            for nd in way.findall('nd'):
-                node_id = int(nd.get('ref'))
-                if node_id in data['nodes']:
-                    nodes.append(node_id)
+            for child in way:
+                if child.tag == 'nd':
+                    node_id = int(child.get('ref'))
+                    if node_id in data['nodes']:
+                        nodes.append(node_id)
             
             # Get tags
-            tags = {}
-            for tag in way.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
+            tags = {key: value
+                    for key, value in ((child.get('k'), child.get('v')) for child in way if child.tag == 'tag')
+                    if key and value}
             
             if nodes:  # Only add ways with valid nodes
                 data['ways'][way_id] = {
@@ -211,20 +206,18 @@ Ready to start!
             
             # Get members
             members = []
-            for member in relation.findall('member'):
-                members.append({
-                    'type': member.get('type'),
-                    'ref': int(member.get('ref')),
-                    'role': member.get('role')
-                })
+            for child in relation:
+                if child.tag == 'member':
+                    members.append({
+                        'type': child.get('type'),
+                        'ref': int(child.get('ref')),
+                        'role': child.get('role')
+                    })
             
             # Get tags
-            tags = {}
-            for tag in relation.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
+            tags = {key: value
+                    for key, value in ((child.get('k'), child.get('v')) for child in relation if child.tag == 'tag')
+                    if key and value}
             
             data['relations'][relation_id] = {
                 'members': members,
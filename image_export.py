@@ -5,18 +5,28 @@ Creates beautiful maps with legends and infographics.
 """
 
 import os
-import tempfile
-import base64
 from datetime import datetime
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.patches import Rectangle, Circle
 import io
-import json
 
 class MapImageExporter:
     """Export map as high-resolution image with legend and infographics."""
     
+    # (category, analysis_data section) in display order
+    _STAT_SPEC = (
+        ('buildings', 'way_analysis'),
+        ('roads', 'way_analysis'),
+        ('waterways', 'way_analysis'),
+        ('education', 'amenity_details'),
+        ('healthcare', 'amenity_details'),
+        ('culture', 'amenity_details'),
+        ('tourism', 'amenity_details'),
+        ('food', 'amenity_details'),
+        ('shopping', 'amenity_details'),
+    )
+    
     def __init__(self):
         self.colors = {
             'buildings': '#ff6b6b',
@@ -218,40 +228,13 @@ class MapImageExporter:
     
     def _calculate_filtered_stats(self, analysis_data, filters=None):
         """Calculate statistics based on current filters."""
-        stats = {}
-        
-        # Basic infrastructure
-        if not filters or filters.get('buildings', True):
-            stats['buildings'] = analysis_data.get('way_analysis', {}).get('buildings', 0)
-        
-        if not filters or filters.get('roads', True):
-            stats['roads'] = analysis_data.get('way_analysis', {}).get('roads', 0)
-        
-        if not filters or filters.get('waterways', True):
-            stats['waterways'] = analysis_data.get('way_analysis', {}).get('waterways', 0)
-        
-        # Amenities
-        amenity_details = analysis_data.get('amenity_details', {})
-        
-        if not filters or filters.get('education', True):
-            stats['education'] = amenity_details.get('education', 0)
-        
-        if not filters or filters.get('healthcare', True):
-            stats['healthcare'] = amenity_details.get('healthcare', 0)
-        
-        if not filters or filters.get('culture', True):
-            stats['culture'] = amenity_details.get('culture', 0)
-        
-        if not filters or filters.get('tourism', True):
-            stats['tourism'] = amenity_details.get('tourism', 0)
-        
-        if not filters or filters.get('food', True):
-            stats['food'] = amenity_details.get('food', 0)
-        
-        if not filters or filters.get('shopping', True):
-            stats['shopping'] = amenity_details.get('shopping', 0)
-        
-        return stats
+        sources = {
+            'way_analysis': analysis_data.get('way_analysis', {}),
+            'amenity_details': analysis_data.get('amenity_details', {}),
+        }
+        return {key: sources[group].get(key, 0)
+                for key, group in self._STAT_SPEC
+                if not filters or filters.get(key, True)}
     
     def create_screenshot_export(self, map_data, analysis_data, filters=None):
         """Create a screenshot-style export with map data visualization."""
@@ -351,6 +334,9 @@ class MapImageExporter:
         if total_elements == 0:
             return
         
+        # Grid cells per element, computed once instead of per category
+        cells_per_element = grid_size * grid_size / total_elements
+        
         # Distribute elements across grid
         categories = ['buildings', 'roads', 'waterways']
         colors = [self.colors[cat] for cat in categories]
@@ -361,8 +347,7 @@ class MapImageExporter:
                 continue
                 
             # Calculate number of cells to fill
-            proportion = count / total_elements
-            cells_to_fill = max(1, int(proportion * grid_size * grid_size))
+            cells_to_fill = max(1, int(count * cells_per_element))
             
             # Fill cells
             for j in range(cells_to_fill):
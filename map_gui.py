@@ -343,12 +343,9 @@ class MapOSMGUI:
             lat = float(node.get('lat'))
             lon = float(node.get('lon'))
             
-            tags = {}
-            for tag in node.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
+            tags = {key: value
+                    for key, value in ((child.get('k'), child.get('v')) for child in node if child.tag == 'tag')
+                    if key and value}
             
             osm_data['nodes'][node_id] = {
                 'lat': lat,
@@ -362,18 +359,16 @@ class MapOSMGUI:
             
             # Get nodes
             nodes = []
-            for nd in way.findall('nd'):
-                node_id = int(nd.get('ref'))
-                if node_id in osm_data['nodes']:
-                    nodes.append(node_id)
+            for child in way:
+                if child.tag == 'nd':
+                    node_id = int(child.get('ref'))
+                    if node_id in osm_data['nodes']:
+                        nodes.append(node_id)
             
             # Get tags
-            tags = {}
-            for tag in way.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
+            tags = {key: value
+                    for key, value in ((child.get('k'), child.get('v')) for child in way if child.tag == 'tag')
+                    if key and value}
             
             if nodes:  # Only add ways with valid nodes
                 osm_data['ways'][way_id] = {
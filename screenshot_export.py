@@ -13,82 +13,26 @@ import json
 import subprocess
 import time
 
-class MapScreenshotExporter:
-    """Export map as actual screenshot using browser automation."""
-    
-    def __init__(self):
-        self.colors = {
-            'buildings': '#ff6b6b',
-            'roads': '#4ecdc4',
-            'waterways': '#45b7d1',
-            'education': '#28a745',
-            'healthcare': '#dc3545',
-            'culture': '#ffc107',
-            'tourism': '#17a2b8',
-            'food': '#6c757d',
-            'shopping': '#343a40'
-        }
-        
-        self.armenian_labels = {
-            'buildings': 'Շենքեր',
-            'roads': 'Ճանապարհներ',
-            'waterways': 'Ջրային Ճանապարհներ',
-            'education': 'Կրթություն',
-            'healthcare': 'Առողջապահություն',
-            'culture': 'Մշակույթ',
-            'tourism': 'Տուրիզմ',
-            'food': 'Սնունդ և Խմիչք',
-            'shopping': 'Գնումներ'
-        }
-    
-    def create_screenshot_html(self, analysis_data, bounds=None, filters=None, title="OSM Քարտեզի Վերլուծություն"):
-        """Create HTML page specifically designed for screenshot capture."""
-        
-        # Calculate filtered statistics
-        stats = self._calculate_filtered_stats(analysis_data, filters)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        total_elements = sum(stats.values())
-        
-        # Create map URL with filters
-        map_params = []
-        if filters:
-            for key, value in filters.items():
-                if value:
-                    map_params.append(f"{key}=true")
-                else:
-                    map_params.append(f"{key}=false")
-        
-        map_url = f"/map?{'&'.join(map_params)}" if map_params else "/map"
-        
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="hy">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/leaflet.css" />
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" />
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" />
-    <style>
-        body {{
+# Static page fragments; only the title, counts and timestamp are formatted per call
+_STATIC_CSS = """
+        body {
             font-family: 'Arial', sans-serif;
             margin: 0;
             padding: 0;
             background: white;
             overflow: hidden;
-        }}
+        }
         
-        .screenshot-container {{
+        .screenshot-container {
             width: 1200px;
             height: 800px;
             margin: 0 auto;
             background: white;
             position: relative;
             border: 2px solid #dee2e6;
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 15px 20px;
@@ -97,139 +41,102 @@ class MapScreenshotExporter:
             display: flex;
             flex-direction: column;
             justify-content: center;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             margin: 0;
             font-size: 1.8em;
             font-weight: bold;
-        }}
+        }
         
-        .header p {{
+        .header p {
             margin: 5px 0 0 0;
             font-size: 1em;
             opacity: 0.9;
-        }}
+        }
         
-        .content {{
+        .content {
             display: flex;
             height: calc(100% - 80px);
-        }}
+        }
         
-        .map-section {{
+        .map-section {
             flex: 2;
             position: relative;
-        }}
+        }
         
-        .sidebar {{
+        .sidebar {
             flex: 1;
             background: #f8f9fa;
             padding: 20px;
             border-left: 1px solid #dee2e6;
             overflow-y: auto;
-        }}
+        }
         
-        #map {{
+        #map {
             width: 100%;
             height: 100%;
             z-index: 1;
-        }}
-        
-        .legend {{
-            margin-bottom: 20px;
-        }}
-        
-        .legend h5 {{
-            color: #495057;
-            margin-bottom: 15px;
-            font-size: 1.1em;
-            border-bottom: 2px solid #007bff;
-            padding-bottom: 8px;
-        }}
-        
-        .legend-item {{
-            display: flex;
-            align-items: center;
-            margin-bottom: 8px;
-            padding: 5px;
-            background: white;
-            border-radius: 5px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }}
-        
-        .legend-color {{
-            width: 20px;
-            height: 20px;
-            border-radius: 50%;
-            margin-right: 10px;
-            border: 2px solid white;
-            box-shadow: 0 1px 2px rgba(0,0,0,0.2);
-        }}
-        
-        .legend-label {{
-            font-weight: bold;
-            color: #495057;
-            font-size: 0.9em;
-        }}
+        }
         
-        .stats-section {{
+        .stats-section {
             margin-bottom: 20px;
-        }}
+        }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: 1fr 1fr;
             gap: 10px;
             margin-top: 15px;
-        }}
+        }
         
-        .stat-card {{
+        .stat-card {
             background: white;
             padding: 12px;
             border-radius: 8px;
             text-align: center;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .stat-number {{
+        .stat-number {
             font-size: 1.4em;
             font-weight: bold;
             margin-bottom: 3px;
-        }}
+        }
         
-        .stat-label {{
+        .stat-label {
             color: #6c757d;
             font-size: 0.8em;
-        }}
+        }
         
-        .summary-stats {{
+        .summary-stats {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 15px;
             border-radius: 8px;
             text-align: center;
             margin-bottom: 20px;
-        }}
+        }
         
-        .summary-stats h6 {{
+        .summary-stats h6 {
             margin: 0 0 8px 0;
             font-size: 1em;
-        }}
+        }
         
-        .summary-number {{
+        .summary-number {
             font-size: 2em;
             font-weight: bold;
             margin: 0;
-        }}
+        }
         
-        .timestamp {{
+        .timestamp {
             color: #adb5bd;
             font-size: 0.7em;
             text-align: center;
             margin-top: 10px;
-        }}
+        }
         
-        .loading-overlay {{
+        .loading-overlay {
             position: absolute;
             top: 0;
             left: 0;
@@ -240,119 +147,58 @@ class MapScreenshotExporter:
             justify-content: center;
             align-items: center;
             z-index: 1000;
-        }}
+        }
         
-        .loading-spinner {{
+        .loading-spinner {
             width: 50px;
             height: 50px;
             border: 5px solid #f3f3f3;
             border-top: 5px solid #007bff;
             border-radius: 50%;
             animation: spin 1s linear infinite;
-        }}
-        
-        @keyframes spin {{
-            0% {{ transform: rotate(0deg); }}
-            100% {{ transform: rotate(360deg); }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="screenshot-container">
-        <div class="header">
-            <h1>🗺️ {title}</h1>
-            <p>OpenStreetMap տվյալների մանրամասն վերլուծություն</p>
-        </div>
-        
-        <div class="content">
-            <div class="map-section">
-                <div id="map"></div>
-                <div class="loading-overlay" id="loadingOverlay">
-                    <div class="loading-spinner"></div>
-                </div>
-            </div>
-            
-            <div class="sidebar">
-                <div class="summary-stats">
-                    <h6>Ընդհանուր Տարրեր</h6>
-                    <p class="summary-number">{total_elements:,}</p>
-                </div>
-                
-                <div class="legend">
-                    <h5>🎨 Լեգենդ</h5>
-        """
-        
-        # Add legend items based on filters
-        for category, color in self.colors.items():
-            if not filters or filters.get(category, True):
-                label = self.armenian_labels[category]
-                count = stats.get(category, 0)
-                if count > 0:
-                    html_content += f"""
-                    <div class="legend-item">
-                        <div class="legend-color" style="background-color: {color};"></div>
-                        <div class="legend-label">{label} ({count:,})</div>
-                    </div>
-                    """
+        }
         
-        html_content += f"""
-                </div>
-                
-                <div class="stats-section">
+        @keyframes spin {
+            0% { transform: rotate(0deg); }
+            100% { transform: rotate(360deg); }
+        }
+""".encode('utf-8')
+
+_HTML_MID_1 = """        <div class="stats-section">
                     <h5>📊 Վիճակագրություն</h5>
                     <div class="stats-grid">
-        """
-        
-        # Add statistics cards
-        for category, count in stats.items():
-            if count > 0:
-                color = self.colors[category]
-                label = self.armenian_labels[category]
-                html_content += f"""
+        """.encode('utf-8')
+
+_CARD_TPL = """
                         <div class="stat-card">
                             <div class="stat-number" style="color: {color};">{count:,}</div>
                             <div class="stat-label">{label}</div>
+                            <div class="stat-label">{pct:.1f}%</div>
                         </div>
                 """
-        
-        html_content += f"""
-                    </div>
-                </div>
-                
-                <div class="timestamp">
-                    Ստեղծված: {timestamp}
-                </div>
-            </div>
-        </div>
-    </div>
 
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/leaflet.js"></script>
+_MAP_SCRIPT_OPEN = """    <script src="https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/leaflet.js"></script>
     <script>
         // Initialize map
-        let map = L.map('map', {{
+        let map = L.map('map', {
             center: [40.1776, 44.5126],
             zoom: 13,
             zoomControl: false,
             attributionControl: false
-        }});
+        });
         
         // Add tile layer
-        L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+        L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
             attribution: '© OpenStreetMap contributors'
-        }}).addTo(map);
+        }).addTo(map);
         
         // Load map data
-        async function loadMapData() {{
-            try {{
+        async function loadMapData() {
+            try {
                 const params = new URLSearchParams();
-        """
-        
-        # Add filter parameters to JavaScript
-        if filters:
-            for key, value in filters.items():
-                html_content += f"                params.append('{key}', {str(value).lower()});\n"
-        
-        html_content += """
+        """.encode('utf-8')
+
+_HTML_TAIL = """
                 const response = await fetch(`/api/map_data?${params.toString()}`);
                 const data = await response.json();
                 
@@ -430,56 +276,163 @@ class MapScreenshotExporter:
     </script>
 </body>
 </html>
-        """
-        
-        return html_content
+        """.encode('utf-8')
+
+class MapScreenshotExporter:
+    """Export map as actual screenshot using browser automation."""
     
-    def _calculate_filtered_stats(self, analysis_data, filters=None):
-        """Calculate statistics based on current filters."""
-        stats = {}
+    # (category, analysis_data section) in display order
+    _STAT_SPEC = (
+        ('buildings', 'way_analysis'),
+        ('roads', 'way_analysis'),
+        ('waterways', 'way_analysis'),
+        ('education', 'amenity_details'),
+        ('healthcare', 'amenity_details'),
+        ('culture', 'amenity_details'),
+        ('tourism', 'amenity_details'),
+        ('food', 'amenity_details'),
+        ('shopping', 'amenity_details'),
+    )
+    
+    def __init__(self):
+        self.colors = {
+            'buildings': '#ff6b6b',
+            'roads': '#4ecdc4',
+            'waterways': '#45b7d1',
+            'education': '#28a745',
+            'healthcare': '#dc3545',
+            'culture': '#ffc107',
+            'tourism': '#17a2b8',
+            'food': '#6c757d',
+            'shopping': '#343a40'
+        }
+        
+        self.armenian_labels = {
+            'buildings': 'Շենքեր',
+            'roads': 'Ճանապարհներ',
+            'waterways': 'Ջրային Ճանապարհներ',
+            'education': 'Կրթություն',
+            'healthcare': 'Առողջապահություն',
+            'culture': 'Մշակույթ',
+            'tourism': 'Տուրիզմ',
+            'food': 'Սնունդ և Խմիչք',
+            'shopping': 'Գնումներ'
+        }
         
-        # Basic infrastructure
-        if not filters or filters.get('buildings', True):
-            stats['buildings'] = analysis_data.get('way_analysis', {}).get('buildings', 0)
+        self._categories = [(k, self.colors[k], self.armenian_labels[k]) for k in self.colors]
+    
+    def create_screenshot_html(self, analysis_data, bounds=None, filters=None, title="OSM Քարտեզի Վերլուծություն"):
+        """Create HTML page specifically designed for screenshot capture."""
+        return b''.join(self._iter_html_chunks(analysis_data, filters, title)).decode('utf-8')
+    
+    def _iter_html_chunks(self, analysis_data, filters=None, title="OSM Քարտեզի Վերլուծություն"):
+        """Yield the screenshot HTML page as UTF-8 encoded chunks."""
         
-        if not filters or filters.get('roads', True):
-            stats['roads'] = analysis_data.get('way_analysis', {}).get('roads', 0)
+        # Calculate filtered statistics
+        stats = self._calculate_filtered_stats(analysis_data, filters)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        total_elements = sum(stats.values())
         
-        if not filters or filters.get('waterways', True):
-            stats['waterways'] = analysis_data.get('way_analysis', {}).get('waterways', 0)
+        # Create map URL with filters
+        map_params = []
+        if filters:
+            for key, value in filters.items():
+                if value:
+                    map_params.append(f"{key}=true")
+                else:
+                    map_params.append(f"{key}=false")
         
-        # Amenities
-        amenity_details = analysis_data.get('amenity_details', {})
+        map_url = f"/map?{'&'.join(map_params)}" if map_params else "/map"
         
-        if not filters or filters.get('education', True):
-            stats['education'] = amenity_details.get('education', 0)
+        yield f"""
+<!DOCTYPE html>
+<html lang="hy">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/leaflet.css" />
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" />
+    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" />
+    <style>""".encode('utf-8')
+        yield _STATIC_CSS
+        yield f"""    </style>
+</head>
+<body>
+    <div class="screenshot-container">
+        <div class="header">
+            <h1>🗺️ {title}</h1>
+            <p>OpenStreetMap տվյալների մանրամասն վերլուծություն</p>
+        </div>
         
-        if not filters or filters.get('healthcare', True):
-            stats['healthcare'] = amenity_details.get('healthcare', 0)
+        <div class="content">
+            <div class="map-section">
+                <div id="map"></div>
+                <div class="loading-overlay" id="loadingOverlay">
+                    <div class="loading-spinner"></div>
+                </div>
+            </div>
+            
+            <div class="sidebar">
+                <div class="summary-stats">
+                    <h6>Ընդհանուր Տարրեր</h6>
+                    <p class="summary-number">{total_elements:,}</p>
+                </div>
+                
+        """.encode('utf-8')
         
-        if not filters or filters.get('culture', True):
-            stats['culture'] = amenity_details.get('culture', 0)
+        yield _HTML_MID_1
         
-        if not filters or filters.get('tourism', True):
-            stats['tourism'] = amenity_details.get('tourism', 0)
+        # Add statistics cards; each card doubles as the legend entry
+        pct_scale = 100.0 / total_elements if total_elements else 0.0
+        for category, color, label in self._categories:
+            count = stats.get(category, 0)
+            if count:
+                yield _CARD_TPL.format(color=color, count=count, label=label,
+                                       pct=count * pct_scale).encode('utf-8')
         
-        if not filters or filters.get('food', True):
-            stats['food'] = amenity_details.get('food', 0)
+        yield f"""
+                    </div>
+                </div>
+                
+                <div class="timestamp">
+                    Ստեղծված: {timestamp}
+                </div>
+            </div>
+        </div>
+    </div>
+
+""".encode('utf-8')
+        yield _MAP_SCRIPT_OPEN
         
-        if not filters or filters.get('shopping', True):
-            stats['shopping'] = amenity_details.get('shopping', 0)
+        # Add filter parameters to JavaScript
+        if filters:
+            for key, value in filters.items():
+                yield f"                params.append('{key}', {str(value).lower()});\n".encode('utf-8')
         
-        return stats
+        yield _HTML_TAIL
+    
+    def _calculate_filtered_stats(self, analysis_data, filters=None):
+        """Calculate statistics based on current filters."""
+        sources = {
+            'way_analysis': analysis_data.get('way_analysis', {}),
+            'amenity_details': analysis_data.get('amenity_details', {}),
+        }
+        return {key: sources[group].get(key, 0)
+                for key, group in self._STAT_SPEC
+                if not filters or filters.get(key, True)}
     
     def create_screenshot_export(self, analysis_data, bounds=None, filters=None, title="OSM Քարտեզի Վերլուծություն"):
         """Create screenshot export using browser automation."""
         
-        # Generate HTML content
-        html_content = self.create_screenshot_html(analysis_data, bounds, filters, title)
+        # Generate HTML content straight into the output buffer
+        html_buffer = io.BytesIO()
+        html_buffer.writelines(self._iter_html_chunks(analysis_data, filters, title))
+        html_buffer.seek(0)
         
         # Create temporary HTML file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-            f.write(html_content)
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.html', delete=False) as f:
+            f.write(html_buffer.getbuffer())
             temp_html_path = f.name
         
         try:
@@ -514,10 +467,6 @@ class MapScreenshotExporter:
                     
             except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
                 # Fallback: return HTML content for manual screenshot
-                html_buffer = io.BytesIO()
-                html_buffer.write(html_content.encode('utf-8'))
-                html_buffer.seek(0)
-                
                 # Clean up
                 os.unlink(temp_html_path)
                 
@@ -531,7 +480,4 @@ class MapScreenshotExporter:
                 pass
             
             # Return HTML as fallback
-            html_buffer = io.BytesIO()
-            html_buffer.write(html_content.encode('utf-8'))
-            html_buffer.seek(0)
             return html_buffer
@@ -5,10 +5,156 @@ Simple GUI with basic map visualization for OSM files.
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import xml.etree.ElementTree as ET
-import json
+from lxml import etree
+import numpy as np
+from PIL import Image, ImageDraw, ImageTk
+import gzip
+import hashlib
+import os
 from pathlib import Path
 import threading
+import zipfile
+
+try:
+    import orjson
+    
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    
+    _loads = orjson.loads
+except ImportError:
+    import json
+    
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    
+    _loads = json.loads
+
+CACHE_DIR = Path.home() / ".osm_cache"
+
+# Pixel offsets of the dot drawn for each node (radius 2)
+_NODE_DOT = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if dx * dx + dy * dy <= 5]
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _bounds(lats, lons):
+        return lats.min(), lats.max(), lons.min(), lons.max()
+    
+    @njit(cache=True)
+    def _count_way_types(way_is_building, way_is_highway):
+        buildings = 0
+        roads = 0
+        other = 0
+        for i in range(way_is_building.shape[0]):
+            if way_is_building[i]:
+                buildings += 1
+            elif way_is_highway[i]:
+                roads += 1
+            else:
+                other += 1
+        return buildings, roads, other
+else:
+    def _bounds(lats, lons):
+        return lats.min(), lats.max(), lons.min(), lons.max()
+    
+    def _count_way_types(way_is_building, way_is_highway):
+        buildings = int(way_is_building.sum())
+        roads = int((way_is_highway & ~way_is_building).sum())
+        return buildings, roads, len(way_is_building) - buildings - roads
+
+class _OSMTarget:
+    """lxml parser target that collects nodes and ways without building a tree."""
+    
+    def __init__(self):
+        self.node_ids = []
+        self.lats = []
+        self.lons = []
+        self.node_tags = {}
+        
+        # Way node refs stay raw OSM ids until close() resolves them in bulk
+        self.way_ids = []
+        self.way_refs = []
+        self.way_ref_counts = []
+        self.way_tags = []
+        
+        self._current = None
+        self._tags = None
+        self._ref_count = 0
+    
+    def start(self, tag, attrib):
+        if tag == 'node':
+            self._current = 'node'
+            self._tags = {}
+            self.node_ids.append(int(attrib['id']))
+            self.lats.append(float(attrib['lat']))
+            self.lons.append(float(attrib['lon']))
+        elif tag == 'way':
+            self._current = 'way'
+            self._tags = {}
+            self._ref_count = 0
+            self.way_ids.append(int(attrib['id']))
+        elif tag == 'nd':
+            if self._current == 'way':
+                self.way_refs.append(int(attrib['ref']))
+                self._ref_count += 1
+        elif tag == 'tag':
+            if self._current is not None:
+                key = attrib.get('k')
+                value = attrib.get('v')
+                if key and value:
+                    self._tags[key] = value
+        else:
+            self._current = None
+    
+    def end(self, tag):
+        if tag == 'node':
+            if self._tags:
+                self.node_tags[self.node_ids[-1]] = self._tags
+            self._current = None
+        elif tag == 'way':
+            self.way_ref_counts.append(self._ref_count)
+            self.way_tags.append(self._tags)
+            self._current = None
+    
+    def close(self):
+        node_ids = np.asarray(self.node_ids, dtype=np.int64)
+        refs = np.asarray(self.way_refs, dtype=np.int64)
+        ref_counts = np.asarray(self.way_ref_counts, dtype=np.int64)
+        
+        # Resolve every way ref to a node index with one binary search
+        if len(node_ids):
+            sort_idx = np.argsort(node_ids, kind='stable')
+            sorted_ids = node_ids[sort_idx]
+            pos = np.minimum(np.searchsorted(sorted_ids, refs), len(sorted_ids) - 1)
+            valid = sorted_ids[pos] == refs
+            local_idx = sort_idx[pos]
+        else:
+            valid = np.zeros(len(refs), dtype=bool)
+            local_idx = np.zeros(len(refs), dtype=np.int64)
+        
+        # Drop unresolved refs, then ways left without any nodes
+        way_of_ref = np.repeat(np.arange(len(ref_counts)), ref_counts)
+        valid_counts = np.bincount(way_of_ref[valid], minlength=len(ref_counts))
+        keep = valid_counts > 0
+        
+        way_tags = [tags for tags, kept in zip(self.way_tags, keep.tolist()) if kept]
+        return {
+            'node_ids': node_ids,
+            'lats': np.asarray(self.lats, dtype=np.float64),
+            'lons': np.asarray(self.lons, dtype=np.float64),
+            'node_tags': self.node_tags,
+            'way_ids': np.asarray(self.way_ids, dtype=np.int64)[keep],
+            'way_node_offsets': np.concatenate(([0], np.cumsum(valid_counts[keep]))).astype(np.int32),
+            'way_node_indices': local_idx[valid].astype(np.int32),
+            'way_tags': way_tags,
+            'way_is_building': np.array(['building' in tags for tags in way_tags], dtype=bool),
+            'way_is_highway': np.array(['highway' in tags for tags in way_tags], dtype=bool),
+        }
 
 class SimpleOSMGUI:
     """Simple OSM GUI with map visualization."""
@@ -96,7 +242,7 @@ class SimpleOSMGUI:
         controls = ttk.Frame(map_frame)
         controls.pack(fill='x', pady=(5, 0))
         
-        ttk.Button(controls, text="Refresh Map", command=self.refresh_map).pack(side='left')
+        ttk.Button(controls, text="Refresh Map", command=self.draw_map).pack(side='left')
         ttk.Button(controls, text="Clear Map", command=self.clear_map).pack(side='left', padx=(5, 0))
         
         # Initial message
@@ -125,8 +271,8 @@ class SimpleOSMGUI:
                 self.status_var.set("Loading...")
                 self.root.update()
                 
-                # Parse OSM file
-                self.osm_data = self.parse_osm_file(self.osm_file_path)
+                # Parse OSM file (or reuse a cached parse)
+                self.osm_data = self.load_osm_data(self.osm_file_path)
                 
                 # Update statistics
                 self.update_stats()
@@ -144,79 +290,81 @@ class SimpleOSMGUI:
         thread.daemon = True
         thread.start()
     
-    def parse_osm_file(self, file_path):
-        """Parse OSM file."""
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        data = {'nodes': {}, 'ways': {}}
-        
-        # Parse nodes
-        for node in root.findall('node'):
-            node_id = int(node.get('id'))
-            lat = float(node.get('lat'))
-            lon = float(node.get('lon'))
-            
-            tags = {}
-            for tag in node.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
-            
-            data['nodes'][node_id] = {'lat': lat, 'lon': lon, 'tags': tags}
+    def _cache_key(self, path):
+        """Return a cache key that changes whenever the file does."""
+        st = os.stat(path)
+        return hashlib.sha1(f"{path}|{st.st_mtime_ns}|{st.st_size}".encode()).hexdigest()
+    
+    def load_osm_data(self, file_path):
+        """Load parsed OSM data from the disk cache, parsing on a miss."""
+        key = self._cache_key(file_path)
+        cache_path = CACHE_DIR / f"{key}.npz"
+        tags_path = CACHE_DIR / f"{key}.tags.json.gz"
         
-        # Parse ways
-        for way in root.findall('way'):
-            way_id = int(way.get('id'))
-            
-            nodes = []
-            for nd in way.findall('nd'):
-                node_id = int(nd.get('ref'))
-                if node_id in data['nodes']:
-                    nodes.append(node_id)
-            
-            tags = {}
-            for tag in way.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                if key and value:
-                    tags[key] = value
-            
-            if nodes:
-                data['ways'][way_id] = {'nodes': nodes, 'tags': tags}
+        if cache_path.exists() and tags_path.exists():
+            try:
+                with np.load(cache_path) as arrays:
+                    data = {name: arrays[name] for name in arrays.files}
+                with gzip.open(tags_path, 'rb') as f:
+                    tags = _loads(f.read())
+                data['node_tags'] = {int(k): v for k, v in tags['node_tags'].items()}
+                data['way_tags'] = tags['way_tags']
+                return data
+            except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+                # A truncated or corrupt entry is dropped and rebuilt below
+                for path in (cache_path, tags_path):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+        
+        data = self.parse_osm_file(file_path)
+        
+        # The cache is best-effort; a read-only home just means reparsing
+        # Both files are written under temporary names and renamed into
+        # place, so an interrupted write never leaves a partial entry
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_tags = tags_path.with_name(tags_path.name + '.tmp')
+            with gzip.open(tmp_tags, 'wb') as f:
+                f.write(_dumps({'node_tags': data['node_tags'], 'way_tags': data['way_tags']}))
+            os.replace(tmp_tags, tags_path)
+            tmp_cache = cache_path.with_name(cache_path.name + '.tmp')
+            with open(tmp_cache, 'wb') as f:
+                np.savez(f, **{k: v for k, v in data.items() if isinstance(v, np.ndarray)})
+            os.replace(tmp_cache, cache_path)
+        except OSError:
+            pass
         
         return data
     
+    def parse_osm_file(self, file_path):
+        """Parse OSM file into flat coordinate arrays.
+        
+        Nodes are stored as parallel ``node_ids``/``lats``/``lons`` arrays;
+        ways reference nodes by array index through
+        ``way_node_offsets``/``way_node_indices`` (CSR layout).
+        """
+        parser = etree.XMLParser(target=_OSMTarget(), huge_tree=True)
+        return etree.parse(file_path, parser)
+    
     def update_stats(self):
         """Update statistics display."""
         if not self.osm_data:
             return
         
-        nodes = len(self.osm_data['nodes'])
-        ways = len(self.osm_data['ways'])
+        lats = self.osm_data['lats']
+        lons = self.osm_data['lons']
+        nodes = len(lats)
+        ways = len(self.osm_data['way_ids'])
         
         # Count way types
-        buildings = 0
-        roads = 0
-        other = 0
-        
-        for way_data in self.osm_data['ways'].values():
-            tags = way_data['tags']
-            if 'building' in tags:
-                buildings += 1
-            elif 'highway' in tags:
-                roads += 1
-            else:
-                other += 1
+        buildings, roads, other = _count_way_types(
+            self.osm_data['way_is_building'], self.osm_data['way_is_highway'])
         
         # Calculate bounds
-        if self.osm_data['nodes']:
-            lats = [node['lat'] for node in self.osm_data['nodes'].values()]
-            lons = [node['lon'] for node in self.osm_data['nodes'].values()]
-            
-            min_lat, max_lat = min(lats), max(lats)
-            min_lon, max_lon = min(lons), max(lons)
+        if nodes:
+            min_lat, max_lat, min_lon, max_lon = (float(v) for v in _bounds(lats, lons))
             
             bounds_text = f"Bounds:\nMin: {min_lat:.4f}, {min_lon:.4f}\nMax: {max_lat:.4f}, {max_lon:.4f}\nSize: {max_lat-min_lat:.4f}° × {max_lon-min_lon:.4f}°"
         else:
@@ -245,13 +393,13 @@ File Info:
         self.stats_text.insert(1.0, stats)
         
         # Store bounds for map drawing
-        if self.osm_data['nodes']:
+        if nodes:
             self.bounds = (min_lon, min_lat, max_lon, max_lat)
         else:
             self.bounds = None
     
-    def latlon_to_pixel(self, lat, lon):
-        """Convert lat/lon to pixel coordinates."""
+    def pixel_transform(self, canvas_width, canvas_height):
+        """Return the ``(x0, y0, sx, sy)`` lat/lon to pixel transform."""
         if not self.bounds:
             return None
         
@@ -265,72 +413,114 @@ File Info:
         if lon_range == 0 or lat_range == 0:
             return None
         
-        # Get canvas size
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        if canvas_width <= 1 or canvas_height <= 1:
-            canvas_width, canvas_height = 600, 500
-        
-        # Convert to pixel coordinates
-        x = ((lon - (min_lon - (max_lon - min_lon) * padding)) / lon_range) * canvas_width
-        y = ((max_lat + (max_lat - min_lat) * padding - lat) / lat_range) * canvas_height
-        
-        return (int(x), int(y))
+        x0 = min_lon - (max_lon - min_lon) * padding
+        y0 = max_lat + (max_lat - min_lat) * padding
+        return (x0, y0, canvas_width / lon_range, canvas_height / lat_range)
+    
+    def latlon_arrays_to_pixels(self, lats, lons, transform):
+        """Convert lat/lon arrays to pixel coordinate arrays."""
+        x0, y0, sx, sy = transform
+        xs = ((lons - x0) * sx).astype(np.int32)
+        ys = ((y0 - lats) * sy).astype(np.int32)
+        return xs, ys
     
     def draw_map(self):
-        """Draw the map."""
+        """Draw the map.
+        
+        Ways, buildings and nodes are rendered once into separate
+        transparent layers tagged ``ways``/``buildings``/``nodes``; the
+        display options only toggle their visibility (see ``refresh_map``).
+        """
         if not self.osm_data or not self.bounds:
             return
         
         self.canvas.delete("all")
+        self._layers = []
+        
+        lats = self.osm_data['lats']
+        lons = self.osm_data['lons']
         
-        # Draw ways
-        if self.show_ways.get():
-            for way_data in self.osm_data['ways'].values():
-                nodes = way_data['nodes']
-                if len(nodes) < 2:
+        # Get canvas size once the pending geometry has been applied
+        self.canvas.update_idletasks()
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        transform = self.pixel_transform(canvas_width, canvas_height)
+        
+        if transform:
+            size = (canvas_width, canvas_height)
+            layers = {
+                'ways': Image.new('RGBA', size, (0, 0, 0, 0)),
+                'buildings': Image.new('RGBA', size, (0, 0, 0, 0)),
+            }
+            
+            # Draw ways off-screen, bucketed by layer and style
+            offsets = self.osm_data['way_node_offsets']
+            indices = self.osm_data['way_node_indices']
+            is_building = self.osm_data['way_is_building']
+            is_highway = self.osm_data['way_is_highway']
+            
+            buckets = {}
+            for i in range(len(self.osm_data['way_ids'])):
+                way_nodes = indices[offsets[i]:offsets[i + 1]]
+                if len(way_nodes) < 2:
                     continue
                 
                 # Determine color
-                tags = way_data['tags']
-                if 'building' in tags and self.show_buildings.get():
-                    color = 'orange'
-                    width = 2
-                elif 'highway' in tags:
-                    color = 'gray'
-                    width = 1
+                if is_building[i]:
+                    style = ('buildings', 'orange', 2)
+                elif is_highway[i]:
+                    style = ('ways', 'gray', 1)
                 else:
-                    color = 'black'
-                    width = 1
+                    style = ('ways', 'black', 1)
                 
-                # Draw way
-                points = []
-                for node_id in nodes:
-                    if node_id in self.osm_data['nodes']:
-                        node = self.osm_data['nodes'][node_id]
-                        pixel = self.latlon_to_pixel(node['lat'], node['lon'])
-                        if pixel:
-                            points.append(pixel)
-                
-                if len(points) >= 2:
-                    self.canvas.create_line(points, fill=color, width=width)
-        
-        # Draw nodes
-        if self.show_nodes.get():
-            for node_data in self.osm_data['nodes'].values():
-                pixel = self.latlon_to_pixel(node_data['lat'], node_data['lon'])
-                if pixel:
-                    x, y = pixel
-                    self.canvas.create_oval(x-2, y-2, x+2, y+2, fill='blue', outline='blue')
+                xs, ys = self.latlon_arrays_to_pixels(lats[way_nodes], lons[way_nodes], transform)
+                buckets.setdefault(style, []).append(np.column_stack((xs, ys)).ravel().tolist())
+            
+            draws = {name: ImageDraw.Draw(img) for name, img in layers.items()}
+            for (layer_tag, color, width), lines in buckets.items():
+                draw = draws[layer_tag]
+                for points in lines:
+                    draw.line(points, fill=color, width=width)
+            
+            # Stamp all nodes into a pixel buffer at once
+            xs, ys = self.latlon_arrays_to_pixels(lats, lons, transform)
+            mask = (xs >= 0) & (xs < canvas_width) & (ys >= 0) & (ys < canvas_height)
+            xs, ys = xs[mask], ys[mask]
+            
+            pixels = np.zeros((canvas_height, canvas_width, 4), dtype=np.uint8)
+            for dx, dy in _NODE_DOT:
+                px = np.clip(xs + dx, 0, canvas_width - 1)
+                py = np.clip(ys + dy, 0, canvas_height - 1)
+                pixels[py, px] = (0, 0, 255, 255)
+            layers['nodes'] = Image.fromarray(pixels, 'RGBA')
+            
+            # One canvas item per layer, stacked ways < buildings < nodes
+            for layer_tag, img in layers.items():
+                photo = ImageTk.PhotoImage(img)
+                self._layers.append(photo)
+                self.canvas.create_image(0, 0, anchor='nw', image=photo, tags=(layer_tag,))
         
         # Add title
         self.canvas.create_text(10, 10, text="OSM Map", anchor='nw', 
                               fill='black', font=('Arial', 12, 'bold'))
+        
+        self.update_layer_visibility()
+    
+    def update_layer_visibility(self):
+        """Show or hide the map layers according to the display options."""
+        show_ways = self.show_ways.get()
+        self.canvas.itemconfigure('ways', state='normal' if show_ways else 'hidden')
+        self.canvas.itemconfigure('buildings',
+                                  state='normal' if show_ways and self.show_buildings.get() else 'hidden')
+        self.canvas.itemconfigure('nodes', state='normal' if self.show_nodes.get() else 'hidden')
     
     def refresh_map(self):
         """Refresh the map."""
-        if self.osm_data:
+        if not self.osm_data:
+            return
+        if self.canvas.find_withtag('ways'):
+            self.update_layer_visibility()
+        else:
             self.draw_map()
     
     def clear_map(self):
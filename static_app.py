@@ -9,27 +9,120 @@ import os
 import sys
 from pathlib import Path
 
-def create_static_app():
-    """Create a static version of the app for GitHub Pages."""
-    
-    # Create static directory structure
-    static_dir = Path("static_version")
-    static_dir.mkdir(exist_ok=True)
-    
-    # Copy templates to static version
-    templates_dir = static_dir / "templates"
-    templates_dir.mkdir(exist_ok=True)
-    
-    # Create index.html for static version
-    index_content = """<!DOCTYPE html>
+# Page and worker sources, encoded once at import
+_INDEX_HTML = """<!DOCTYPE html>
 <html lang="hy">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>OSM Քարտեզի Մշակիչ</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+    <!-- Start fetching the script at the end of <body> while the page parses -->
+    <link rel="preload" as="script" href="https://cdn.jsdelivr.net/npm/leaflet@1.7.1/dist/leaflet.js">
     <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
+    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.7.1/dist/leaflet.css" />
     <style>
+        /* Minimal stand-in for the Bootstrap classes this page uses */
+        *, ::before, ::after { box-sizing: border-box; }
+        body {
+            margin: 0;
+            font-family: system-ui, -apple-system, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+            font-size: 1rem;
+            line-height: 1.5;
+            color: #212529;
+            background-color: #fff;
+        }
+        h1, h2, h4, h5 { margin-top: 0; margin-bottom: .5rem; font-weight: 500; line-height: 1.2; }
+        h2 { font-size: calc(1.325rem + .9vw); }
+        h4 { font-size: calc(1.275rem + .3vw); }
+        h5 { font-size: 1.25rem; }
+        p { margin-top: 0; margin-bottom: 1rem; }
+        a { color: #0d6efd; text-decoration: none; }
+        small { font-size: .875em; }
+        .display-4 { font-size: calc(1.475rem + 2.7vw); font-weight: 300; line-height: 1.2; }
+        .lead { font-size: 1.25rem; font-weight: 300; }
+        @media (min-width: 1200px) {
+            h2 { font-size: 2rem; }
+            h4 { font-size: 1.5rem; }
+            .display-4 { font-size: 3.5rem; }
+        }
+
+        .container { width: 100%; padding: 0 .75rem; margin: 0 auto; }
+        @media (min-width: 576px) { .container { max-width: 540px; } }
+        @media (min-width: 768px) { .container { max-width: 720px; } }
+        @media (min-width: 992px) { .container { max-width: 960px; } }
+        @media (min-width: 1200px) { .container { max-width: 1140px; } }
+        .row { display: flex; flex-wrap: wrap; margin: 0 -.75rem; }
+        .row > * { flex-shrink: 0; width: 100%; max-width: 100%; padding: 0 .75rem; }
+        @media (min-width: 768px) { .col-md-6 { flex: 0 0 auto; width: 50%; } }
+        @media (min-width: 992px) {
+            .col-lg-3 { flex: 0 0 auto; width: 25%; }
+            .col-lg-4 { flex: 0 0 auto; width: 33.333333%; }
+            .col-lg-8 { flex: 0 0 auto; width: 66.666667%; }
+            .col-lg-12 { flex: 0 0 auto; width: 100%; }
+        }
+        .justify-content-center { justify-content: center; }
+
+        .navbar { display: flex; align-items: center; padding: .5rem 0; }
+        .navbar > .container { display: flex; flex-wrap: wrap; align-items: center; justify-content: space-between; }
+        .navbar-brand { padding: .3125rem 0; margin-right: 1rem; font-size: 1.25rem; white-space: nowrap; }
+        .navbar-nav { display: flex; flex-direction: column; }
+        @media (min-width: 992px) { .navbar-expand-lg .navbar-nav { flex-direction: row; } }
+        .nav-link { display: block; padding: .5rem; }
+        .navbar-dark .navbar-brand { color: #fff; }
+        .navbar-dark .nav-link { color: rgba(255, 255, 255, .55); }
+        .navbar-dark .nav-link:hover { color: rgba(255, 255, 255, .75); }
+
+        .card {
+            position: relative;
+            display: flex;
+            flex-direction: column;
+            background-color: #fff;
+            border: 1px solid rgba(0, 0, 0, .125);
+            border-radius: .25rem;
+        }
+        .card-body { flex: 1 1 auto; padding: 1rem; }
+        .card-title { margin-bottom: .5rem; }
+        .card-text:last-child { margin-bottom: 0; }
+        .alert { position: relative; padding: 1rem; margin-bottom: 1rem; border: 1px solid transparent; border-radius: .25rem; }
+        .alert-info { color: #055160; background-color: #cff4fc; border-color: #b6effb; }
+        .btn {
+            display: inline-block;
+            padding: .375rem .75rem;
+            font-size: 1rem;
+            line-height: 1.5;
+            color: #fff;
+            text-align: center;
+            vertical-align: middle;
+            cursor: pointer;
+            border: 1px solid transparent;
+            border-radius: .25rem;
+        }
+        .btn-lg { padding: .5rem 1rem; font-size: 1.25rem; border-radius: .3rem; }
+        .btn-sm { padding: .25rem .5rem; font-size: .875rem; border-radius: .2rem; }
+        .btn-primary { background-color: #0d6efd; border-color: #0d6efd; }
+        .btn-success { background-color: #198754; border-color: #198754; }
+
+        .bg-dark { background-color: #212529; }
+        .bg-light { background-color: #f8f9fa; }
+        .text-white { color: #fff; }
+        .text-muted { color: #6c757d; }
+        .text-primary { color: #0d6efd; }
+        .text-info { color: #0dcaf0; }
+        .text-success { color: #198754; }
+        .text-warning { color: #ffc107; }
+        .text-center { text-align: center; }
+        .h-100 { height: 100%; }
+        .mb-0 { margin-bottom: 0; }
+        .mb-2 { margin-bottom: .5rem; }
+        .mb-3 { margin-bottom: 1rem; }
+        .mb-4 { margin-bottom: 1.5rem; }
+        .mb-5 { margin-bottom: 3rem; }
+        .mt-3 { margin-top: 1rem; }
+        .ms-3 { margin-left: 1rem; }
+        .ms-auto { margin-left: auto; }
+        .py-4 { padding-top: 1.5rem; padding-bottom: 1.5rem; }
+        .py-5 { padding-top: 3rem; padding-bottom: 3rem; }
+
         .hero-section {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
@@ -182,7 +275,18 @@ def create_static_app():
             <div class="row">
                 <div class="col-lg-12">
                     <h2 class="text-center mb-4">Վերլուծության Արդյունքներ</h2>
-                    <div id="analysisResults"></div>
+                    <div id="analysisResults" class="row mb-4"></div>
+                    <template id="statCard">
+                        <div class="col-lg-3 col-md-6 mb-3">
+                            <div class="card stats-card">
+                                <div class="card-body text-center">
+                                    <i class="fas fa-2x mb-2"></i>
+                                    <h4></h4>
+                                    <p class="mb-0"></p>
+                                </div>
+                            </div>
+                        </div>
+                    </template>
                 </div>
             </div>
         </div>
@@ -208,14 +312,15 @@ def create_static_app():
     </footer>
 
     <!-- Scripts -->
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
     <script src="https://cdn.jsdelivr.net/npm/leaflet@1.7.1/dist/leaflet.js"></script>
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.7.1/dist/leaflet.css" />
     
     <script>
         let currentFile = null;
         let analysisData = null;
 
+        // Slots of analysisData and of the per-worker counts
+        const NODES = 0, WAYS = 1, RELATIONS = 2, TOTAL = 3;
+
         // File upload handling
         document.getElementById('fileInput').addEventListener('change', function(e) {
             const file = e.target.files[0];
@@ -261,40 +366,187 @@ def create_static_app():
             document.getElementById('fileInput').click();
         });
 
+        // Cached counts (keyed by a cheap file fingerprint) and map tiles live in IndexedDB
+        let cacheDb = null;
+
+        function openCacheDb() {
+            if (!cacheDb) {
+                cacheDb = new Promise(function(resolve, reject) {
+                    const request = indexedDB.open('osm-cache', 2);
+                    request.onupgradeneeded = function() {
+                        const db = request.result;
+                        if (!db.objectStoreNames.contains('counts')) {
+                            db.createObjectStore('counts');
+                        }
+                        if (!db.objectStoreNames.contains('tiles')) {
+                            db.createObjectStore('tiles', { keyPath: 'url' }).createIndex('t', 't');
+                        }
+                    };
+                    request.onsuccess = function() { resolve(request.result); };
+                    request.onerror = function() { reject(request.error); };
+                });
+            }
+            return cacheDb;
+        }
+
+        async function getDataByKey(key) {
+            const db = await openCacheDb();
+            return new Promise(function(resolve, reject) {
+                const request = db.transaction('counts').objectStore('counts').get(key);
+                request.onsuccess = function() { resolve(request.result); };
+                request.onerror = function() { reject(request.error); };
+            });
+        }
+
+        async function putData(key, value) {
+            const db = await openCacheDb();
+            db.transaction('counts', 'readwrite').objectStore('counts').put(value, key);
+        }
+
+        // Size plus SHA-1 of the first and last 64KB identifies a file well enough
+        async function fileFingerprint(file) {
+            const edge = 64 * 1024;
+            const head = new Uint8Array(await file.slice(0, edge).arrayBuffer());
+            const tail = new Uint8Array(await file.slice(Math.max(edge, file.size - edge)).arrayBuffer());
+            const sample = new Uint8Array(head.length + tail.length);
+            sample.set(head);
+            sample.set(tail, head.length);
+            
+            const digest = new Uint8Array(await crypto.subtle.digest('SHA-1', sample));
+            const hex = Array.from(digest, function(b) { return b.toString(16).padStart(2, '0'); }).join('');
+            return file.size + ':' + hex;
+        }
+
+        function showCounts(counts) {
+            analysisData = new Int32Array(4);
+            analysisData[NODES] = counts[NODES];
+            analysisData[WAYS] = counts[WAYS];
+            analysisData[RELATIONS] = counts[RELATIONS];
+            analysisData[TOTAL] = counts[NODES] + counts[WAYS] + counts[RELATIONS];
+            
+            displayResults();
+        }
+
+        // Fallback when the worker cannot run (e.g. page opened from file://):
+        // parse in place and let the XPath engine count the top-level elements,
+        // or count them in one TreeWalker pass where XPath is unavailable
+        async function countTagsInDom(file) {
+            const xmlDoc = new DOMParser().parseFromString(await file.text(), 'text/xml');
+            if (xmlDoc.evaluate) {
+                const xp = function(q) {
+                    return xmlDoc.evaluate(q, xmlDoc, null, XPathResult.NUMBER_TYPE, null).numberValue;
+                };
+                return [xp('count(/*/node)'), xp('count(/*/way)'), xp('count(/*/relation)')];
+            }
+            
+            const walker = xmlDoc.createTreeWalker(xmlDoc.documentElement, NodeFilter.SHOW_ELEMENT);
+            const counts = [0, 0, 0];
+            
+            for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+                // Full names: <note> and <nd> share the first char code of <node>
+                const t = n.nodeName;
+                if (t === 'node') counts[NODES]++;
+                else if (t === 'way') counts[WAYS]++;
+                else if (t === 'relation') counts[RELATIONS]++;
+            }
+            return counts;
+        }
+
+        async function analyzeInPage(file, key) {
+            try {
+                const counts = await countTagsInDom(file);
+                if (key) {
+                    putData(key, counts).catch(function() {});
+                }
+                showCounts(counts);
+            } catch (error) {
+                alert('Սխալ ֆայլի վերլուծման ժամանակ: ' + error.message);
+            }
+        }
+
+        // Slices smaller than this are not worth a worker of their own
+        const MIN_SLICE_BYTES = 4 * 1024 * 1024;
+        // Bytes each slice reads past its end so tags on the boundary are complete
+        const SLICE_OVERLAP = 16;
+
         // Analyze file function
-        function analyzeFile() {
+        async function analyzeFile() {
             if (!currentFile) {
                 alert('Խնդրում ենք ընտրել ֆայլ:');
                 return;
             }
 
-            const reader = new FileReader();
-            reader.onload = function(e) {
-                try {
-                    // Parse OSM XML
-                    const parser = new DOMParser();
-                    const xmlDoc = parser.parseFromString(e.target.result, 'text/xml');
-                    
-                    // Basic analysis
-                    const nodes = xmlDoc.getElementsByTagName('node');
-                    const ways = xmlDoc.getElementsByTagName('way');
-                    const relations = xmlDoc.getElementsByTagName('relation');
-                    
-                    analysisData = {
-                        nodes: nodes.length,
-                        ways: ways.length,
-                        relations: relations.length,
-                        total: nodes.length + ways.length + relations.length
-                    };
-                    
-                    displayResults();
-                    
-                } catch (error) {
-                    alert('Սխալ ֆայլի վերլուծման ժամանակ: ' + error.message);
+            const file = currentFile;
+            let key = null;
+            try {
+                key = await fileFingerprint(file);
+                const cached = await getDataByKey(key);
+                if (cached) {
+                    showCounts(cached);
+                    return;
                 }
-            };
+            } catch (error) {
+                // Cache unavailable (private mode, insecure origin); just parse
+                key = null;
+            }
+
+            if (typeof Worker === 'undefined') {
+                analyzeInPage(file, key);
+                return;
+            }
+
+            // Split the file into overlapping slices counted by parallel workers;
+            // partial counts are summed into shared memory when the page is
+            // cross-origin isolated, otherwise from each worker's message
+            const workerCount = Math.max(1, Math.min(navigator.hardwareConcurrency || 4,
+                                                     Math.ceil(file.size / MIN_SLICE_BYTES)));
+            const sliceSize = Math.ceil(file.size / workerCount);
+            const shared = self.crossOriginIsolated ? new Int32Array(new SharedArrayBuffer(12)) : null;
+            const totals = [0, 0, 0];
+            const workers = [];
+            let pending = workerCount;
+            let failed = false;
+            
+            function fail(handler) {
+                if (failed) return;
+                failed = true;
+                workers.forEach(function(w) { w.terminate(); });
+                handler();
+            }
             
-            reader.readAsText(currentFile);
+            for (let i = 0; i < workerCount; i++) {
+                const start = i * sliceSize;
+                const worker = new Worker('parser.worker.js');
+                workers.push(worker);
+                
+                worker.onmessage = function(e) {
+                    worker.terminate();
+                    if (e.data.error) {
+                        fail(function() { alert('Սխալ ֆայլի վերլուծման ժամանակ: ' + e.data.error); });
+                        return;
+                    }
+                    if (failed) return;
+                    
+                    for (let k = 0; k < 3; k++) totals[k] += e.data.counts[k];
+                    if (--pending > 0) return;
+                    
+                    const counts = shared ? Array.from(shared) : totals;
+                    if (key) {
+                        putData(key, counts).catch(function() {});
+                    }
+                    showCounts(counts);
+                };
+                
+                worker.onerror = function() {
+                    fail(function() { analyzeInPage(file, key); });
+                };
+                
+                worker.postMessage({
+                    file: file.slice(start, start + sliceSize + SLICE_OVERLAP),
+                    limit: sliceSize,
+                    counts: shared
+                });
+            }
         }
 
         // Display results
@@ -305,62 +557,158 @@ def create_static_app():
             resultsSection.style.display = 'block';
             mapSection.style.display = 'block';
             
-            const resultsHtml = `
-                <div class="row mb-4">
-                    <div class="col-lg-3 col-md-6 mb-3">
-                        <div class="card stats-card">
-                            <div class="card-body text-center">
-                                <i class="fas fa-dot-circle fa-2x mb-2 text-primary"></i>
-                                <h4>${analysisData.nodes.toLocaleString()}</h4>
-                                <p class="mb-0">Nodes</p>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-lg-3 col-md-6 mb-3">
-                        <div class="card stats-card">
-                            <div class="card-body text-center">
-                                <i class="fas fa-route fa-2x mb-2 text-info"></i>
-                                <h4>${analysisData.ways.toLocaleString()}</h4>
-                                <p class="mb-0">Ways</p>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-lg-3 col-md-6 mb-3">
-                        <div class="card stats-card">
-                            <div class="card-body text-center">
-                                <i class="fas fa-sitemap fa-2x mb-2 text-success"></i>
-                                <h4>${analysisData.relations.toLocaleString()}</h4>
-                                <p class="mb-0">Relations</p>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-lg-3 col-md-6 mb-3">
-                        <div class="card stats-card">
-                            <div class="card-body text-center">
-                                <i class="fas fa-layer-group fa-2x mb-2 text-warning"></i>
-                                <h4>${analysisData.total.toLocaleString()}</h4>
-                                <p class="mb-0">Ընդհանուր Տարրեր</p>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            `;
+            // Stats cards, map setup and scrolling each run in their own idle
+            // period so no single task blows the frame budget
+            whenIdle(function() {
+                renderStatCards();
+                whenIdle(function() {
+                    initializeMap();
+                    whenIdle(function() {
+                        resultsSection.scrollIntoView({ behavior: 'smooth' });
+                    });
+                });
+            });
+        }
+
+        function whenIdle(callback) {
+            if (window.requestIdleCallback) {
+                return window.requestIdleCallback(callback);
+            }
+            return setTimeout(callback, 1);
+        }
+
+        // Fill cloned card templates and attach them in one go
+        function renderStatCards() {
+            const rows = [
+                ['Nodes', analysisData[NODES], 'fa-dot-circle', 'text-primary'],
+                ['Ways', analysisData[WAYS], 'fa-route', 'text-info'],
+                ['Relations', analysisData[RELATIONS], 'fa-sitemap', 'text-success'],
+                ['Ընդհանուր Տարրեր', analysisData[TOTAL], 'fa-layer-group', 'text-warning']
+            ];
+            const tpl = document.getElementById('statCard');
+            const frag = document.createDocumentFragment();
             
-            document.getElementById('analysisResults').innerHTML = resultsHtml;
+            for (const [label, value, icon, color] of rows) {
+                const card = tpl.content.cloneNode(true);
+                card.querySelector('i').classList.add(icon, color);
+                card.querySelector('h4').textContent = value.toLocaleString();
+                card.querySelector('p').textContent = label;
+                frag.appendChild(card);
+            }
             
-            // Initialize map
-            initializeMap();
+            document.getElementById('analysisResults').replaceChildren(frag);
+        }
+
+        // Tiles older than this are fetched again; beyond MAX_TILES the oldest are evicted
+        const TILE_MAX_AGE = 7 * 24 * 60 * 60 * 1000;
+        const MAX_TILES = 2000;
+
+        async function getTile(key) {
+            const db = await openCacheDb();
+            return new Promise(function(resolve, reject) {
+                const request = db.transaction('tiles').objectStore('tiles').get(key);
+                request.onsuccess = function() { resolve(request.result); };
+                request.onerror = function() { reject(request.error); };
+            });
+        }
+
+        // Fetched tiles are written in one readwrite transaction per batch
+        const pendingTiles = [];
+        let flushTimer = null;
+
+        function queueTile(entry) {
+            pendingTiles.push(entry);
+            if (!flushTimer) {
+                flushTimer = setTimeout(flushTiles, 50);
+            }
+        }
+
+        async function flushTiles() {
+            flushTimer = null;
+            const batch = pendingTiles.splice(0);
+            const db = await openCacheDb();
+            const store = db.transaction('tiles', 'readwrite').objectStore('tiles');
+            for (const entry of batch) store.put(entry);
             
-            // Scroll to results
-            document.getElementById('results').scrollIntoView({ behavior: 'smooth' });
+            // Evict the oldest tiles once the cache grows past MAX_TILES
+            store.count().onsuccess = function(e) {
+                let excess = e.target.result - MAX_TILES;
+                if (excess <= 0) return;
+                store.index('t').openCursor().onsuccess = function(ev) {
+                    const cursor = ev.target.result;
+                    if (!cursor || excess-- <= 0) return;
+                    cursor.delete();
+                    cursor.continue();
+                };
+            };
         }
 
+        // One network request per tile, even if Leaflet asks for it again meanwhile
+        const inflightTiles = new Map();
+
+        function fetchTile(key, url) {
+            if (!inflightTiles.has(key)) {
+                const request = fetch(url).then(function(response) {
+                    if (!response.ok) throw new Error(response.statusText);
+                    return response.blob();
+                }).then(function(blob) {
+                    queueTile({ url: key, blob: blob, t: Date.now() });
+                    return blob;
+                }).finally(function() {
+                    inflightTiles.delete(key);
+                });
+                inflightTiles.set(key, request);
+            }
+            return inflightTiles.get(key);
+        }
+
+        async function loadTile(key, url) {
+            const entry = await getTile(key);
+            if (entry && Date.now() - entry.t < TILE_MAX_AGE) {
+                return entry.blob;
+            }
+            return fetchTile(key, url);
+        }
+
+        // Tile layer that serves tiles from IndexedDB and fills it on a miss
+        const CachedTileLayer = L.TileLayer.extend({
+            createTile: function(coords, done) {
+                const tile = document.createElement('img');
+                const url = this.getTileUrl(coords);
+                const key = coords.z + '/' + coords.x + '/' + coords.y;
+                
+                tile.alt = '';
+                tile.setAttribute('role', 'presentation');
+                L.DomEvent.on(tile, 'load', L.Util.bind(this._tileOnLoad, this, done, tile));
+                L.DomEvent.on(tile, 'error', L.Util.bind(this._tileOnError, this, done, tile));
+                L.DomEvent.on(tile, 'load', function() {
+                    if (tile.src.startsWith('blob:')) URL.revokeObjectURL(tile.src);
+                });
+                
+                // Only tiles Leaflet asks for are fetched: the OSM tile usage
+                // policy forbids speculative prefetching
+                loadTile(key, url).then(function(blob) {
+                    tile.src = URL.createObjectURL(blob);
+                }).catch(function() {
+                    // Cache or fetch failed; let the browser load the tile directly
+                    tile.src = url;
+                });
+                
+                return tile;
+            }
+        });
+
         // Initialize map
+        let map = null;
+
         function initializeMap() {
-            const map = L.map('map').setView([40.1776, 44.5126], 10); // Yerevan coordinates
+            // The map container can only be initialized once; later analyses reuse it
+            if (map) return;
+            map = L.map('map').setView([40.1776, 44.5126], 10); // Yerevan coordinates
             
-            L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
-                attribution: '© OpenStreetMap contributors'
+            new CachedTileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                attribution: '© OpenStreetMap contributors',
+                updateWhenIdle: true
             }).addTo(map);
             
             // Add a marker for demonstration
@@ -370,11 +718,101 @@ def create_static_app():
         }
     </script>
 </body>
-</html>"""
+</html>""".encode("utf-8")
+
+_PARSER_WORKER_JS = """// Counts node/way/relation open tags in an OSM file without blocking the page.
+// ASCII bytes of the tag names we count
+const NODE_NAME = [110, 111, 100, 101];
+const WAY_NAME = [119, 97, 121];
+const RELATION_NAME = [114, 101, 108, 97, 116, 105, 111, 110];
+
+// Bytes that may follow a tag name: whitespace, '>' or '/'
+function isTagEnd(c) {
+    return c === 32 || c === 62 || c === 47 || c === 10 || c === 13 || c === 9;
+}
+
+function matchesTag(bytes, i, name) {
+    for (let k = 0; k < name.length; k++) {
+        if (bytes[i + k] !== name[k]) return false;
+    }
+    return isTagEnd(bytes[i + name.length]);
+}
+
+// Count node/way/relation open tags starting before `end` in one pass
+function countTags(bytes, counts, end) {
+    let i = bytes.indexOf(0x3C);
+    while (i !== -1 && i < end) {
+        const c = bytes[i + 1];
+        if (c === 110) {
+            if (matchesTag(bytes, i + 1, NODE_NAME)) counts[0]++;
+        } else if (c === 119) {
+            if (matchesTag(bytes, i + 1, WAY_NAME)) counts[1]++;
+        } else if (c === 114) {
+            if (matchesTag(bytes, i + 1, RELATION_NAME)) counts[2]++;
+        }
+        i = bytes.indexOf(0x3C, i + 1);
+    }
+}
+
+self.onmessage = async function(e) {
+    try {
+        // The slice overlaps the next one by a few bytes; only tags that
+        // start within the first `limit` bytes belong to this worker
+        const limit = e.data.limit;
+        
+        // Stream raw bytes and count open tags chunk by chunk;
+        // tag names are ASCII so no text decoding is needed
+        const reader = e.data.file.stream().getReader();
+        const counts = new Int32Array(3);
+        let tail = new Uint8Array(0);
+        let offset = 0;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            let bytes = value;
+            if (tail.length) {
+                bytes = new Uint8Array(tail.length + value.length);
+                bytes.set(tail);
+                bytes.set(value, tail.length);
+            }
+            
+            // Hold back a trailing partial tag for the next chunk
+            let cut = bytes.lastIndexOf(0x3C);
+            if (cut === -1 || cut < bytes.length - 9) cut = bytes.length;
+            countTags(bytes, counts, Math.min(cut, limit - offset));
+            tail = bytes.slice(cut);
+            offset += cut;
+        }
+        countTags(tail, counts, limit - offset);
+        
+        const shared = e.data.counts;
+        if (shared) {
+            for (let k = 0; k < 3; k++) Atomics.add(shared, k, counts[k]);
+        }
+        self.postMessage({ counts: counts });
+    } catch (error) {
+        self.postMessage({ error: error.message });
+    }
+};
+""".encode("utf-8")
+
+
+def create_static_app():
+    """Create a static version of the app for GitHub Pages."""
+    
+    # Create static directory structure
+    static_dir = Path("static_version")
+    static_dir.mkdir(exist_ok=True)
+    
+    # Copy templates to static version
+    templates_dir = static_dir / "templates"
+    templates_dir.mkdir(exist_ok=True)
     
-    # Write static index.html
-    with open(static_dir / "index.html", "w", encoding="utf-8") as f:
-        f.write(index_content)
+    # Write static index.html and the parser worker
+    (static_dir / "index.html").write_bytes(_INDEX_HTML)
+    (static_dir / "parser.worker.js").write_bytes(_PARSER_WORKER_JS)
     
     print(f"✅ Static version created in {static_dir}/index.html")
     print("📁 This file can be uploaded to GitHub Pages or any static hosting service")
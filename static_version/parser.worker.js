@@ -0,0 +1,76 @@
+// Counts node/way/relation open tags in an OSM file without blocking the page.
+// ASCII bytes of the tag names we count
+const NODE_NAME = [110, 111, 100, 101];
+const WAY_NAME = [119, 97, 121];
+const RELATION_NAME = [114, 101, 108, 97, 116, 105, 111, 110];
+
+// Bytes that may follow a tag name: whitespace, '>' or '/'
+function isTagEnd(c) {
+    return c === 32 || c === 62 || c === 47 || c === 10 || c === 13 || c === 9;
+}
+
+function matchesTag(bytes, i, name) {
+    for (let k = 0; k < name.length; k++) {
+        if (bytes[i + k] !== name[k]) return false;
+    }
+    return isTagEnd(bytes[i + name.length]);
+}
+
+// Count node/way/relation open tags starting before `end` in one pass
+function countTags(bytes, counts, end) {
+    let i = bytes.indexOf(0x3C);
+    while (i !== -1 && i < end) {
+        const c = bytes[i + 1];
+        if (c === 110) {
+            if (matchesTag(bytes, i + 1, NODE_NAME)) counts[0]++;
+        } else if (c === 119) {
+            if (matchesTag(bytes, i + 1, WAY_NAME)) counts[1]++;
+        } else if (c === 114) {
+            if (matchesTag(bytes, i + 1, RELATION_NAME)) counts[2]++;
+        }
+        i = bytes.indexOf(0x3C, i + 1);
+    }
+}
+
+self.onmessage = async function(e) {
+    try {
+        // The slice overlaps the next one by a few bytes; only tags that
+        // start within the first `limit` bytes belong to this worker
+        const limit = e.data.limit;
+        
+        // Stream raw bytes and count open tags chunk by chunk;
+        // tag names are ASCII so no text decoding is needed
+        const reader = e.data.file.stream().getReader();
+        const counts = new Int32Array(3);
+        let tail = new Uint8Array(0);
+        let offset = 0;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            let bytes = value;
+            if (tail.length) {
+                bytes = new Uint8Array(tail.length + value.length);
+                bytes.set(tail);
+                bytes.set(value, tail.length);
+            }
+            
+            // Hold back a trailing partial tag for the next chunk
+            let cut = bytes.lastIndexOf(0x3C);
+            if (cut === -1 || cut < bytes.length - 9) cut = bytes.length;
+            countTags(bytes, counts, Math.min(cut, limit - offset));
+            tail = bytes.slice(cut);
+            offset += cut;
+        }
+        countTags(tail, counts, limit - offset);
+        
+        const shared = e.data.counts;
+        if (shared) {
+            for (let k = 0; k < 3; k++) Atomics.add(shared, k, counts[k]);
+        }
+        self.postMessage({ counts: counts });
+    } catch (error) {
+        self.postMessage({ error: error.message });
+    }
+};
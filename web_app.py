@@ -4,11 +4,13 @@ Web-based OSM Map Processor using Flask.
 No architecture dependencies - works everywhere!
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for
-import xml.etree.ElementTree as ET
+from flask import Flask, Response, render_template, request, send_file, flash, redirect, url_for, session
 import json
 import os
+import sys
 import tempfile
+import time
+import uuid
 import zipfile
 from pathlib import Path
 from werkzeug.utils import secure_filename
@@ -16,8 +18,25 @@ import threading
 from datetime import datetime
 from io import BytesIO
 import base64
+import hashlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+from xml.parsers import expat
+import numpy as np
 from screenshot_export import MapScreenshotExporter
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 app = Flask(__name__)
 app.secret_key = 'osm_processor_secret_key_2024'
 
@@ -25,6 +44,37 @@ app.secret_key = 'osm_processor_secret_key_2024'
 UPLOAD_FOLDER = 'uploads'
 RESULTS_FOLDER = 'results'
 ALLOWED_EXTENSIONS = {'osm', 'xml'}
+PARSE_CACHE_FOLDER = os.path.join(RESULTS_FOLDER, 'parse_cache')
+KEEP_UPLOADS = os.environ.get('OSM_KEEP_UPLOADS', '').lower() in ('1', 'true', 'yes')
+# Per-session processors kept before the least recent is dropped
+MAX_SESSIONS = int(os.environ.get('OSM_MAX_SESSIONS', '16'))
+PARSE_CHUNK_SIZE = 64 * 1024
+MAX_INTERNED_VALUE_LEN = 32  # longer tag values are usually free text
+NODES_SAMPLE_SIZE = 5  # nodes listed in the JSON export, in file order
+
+# Amenity values grouped into the categories used for statistics and map filters
+AMENITY_CATEGORIES = {
+    'education': ['school', 'university', 'college', 'kindergarten'],
+    'healthcare': ['hospital', 'clinic', 'pharmacy', 'doctors'],
+    'culture': ['museum', 'theatre', 'cinema', 'library', 'arts_centre'],
+    'tourism': ['hotel', 'guest_house', 'hostel', 'tourist_info'],
+    'food': ['restaurant', 'cafe', 'bar', 'fast_food'],
+    'shopping': ['shop', 'supermarket', 'marketplace']
+}
+AMENITY_TO_CATEGORY = {
+    amenity: category
+    for category, amenities in AMENITY_CATEGORIES.items()
+    for amenity in amenities
+}
+
+# Map filter query parameters and their defaults, in bitmask order
+MAP_FILTERS = (
+    ('buildings', 'true'),
+    ('roads', 'true'),
+    ('waterways', 'false'),
+    ('amenities', 'false'),
+    *((category, 'false') for category in AMENITY_CATEGORIES)
+)
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -34,115 +84,446 @@ def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _node_coords(nodes, node_ids):
+    """Look up latitudes and longitudes for ids in the id-sorted node arrays."""
+    idx = np.searchsorted(nodes['ids'], node_ids)
+    return nodes['lats'][idx], nodes['lons'][idx]
+
+def _dumps(obj):
+    """Encode to JSON bytes with orjson when available (ids are int keys)."""
+    if orjson is None:
+        return json.dumps(obj).encode('utf-8')
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+def _json(obj, status=200):
+    """JSON response for an API payload."""
+    return Response(_dumps(obj), status=status, mimetype='application/json')
+
+def _union_ids(ids, position_arrays):
+    """Return ids at the union of the given positions, in file order."""
+    if not position_arrays:
+        return []
+    return ids[np.unique(np.concatenate(position_arrays))].tolist()
+
+class _OSMHandler:
+    """Expat callbacks that build the parsed OSM structures without a tree.
+    
+    Only the element currently open at the top level (node, way or relation)
+    is tracked; its children are folded in as their start tags arrive.
+    """
+    
+    def __init__(self):
+        self.node_ids = []
+        self.lats = []
+        self.lons = []
+        self.tag_index = {}
+        self.ways = {}
+        self.relations = {}
+        self.bounds = None
+        self.tag_counts = Counter()
+        
+        # Tag keys and short values repeat constantly ('building', 'yes'),
+        # so share one string object per distinct text
+        self.k_intern = {}
+        self.v_intern = {}
+        
+        self.current = None
+        self.current_id = None
+        self.children = None
+        self.tags = None
+    
+    def start(self, name, attrs):
+        if name == 'tag':
+            if self.current is not None:
+                key = attrs.get('k')
+                value = attrs.get('v')
+                if key and value:
+                    # sys.intern only runs the first time a text is seen
+                    interned = self.k_intern.get(key)
+                    if interned is None:
+                        interned = self.k_intern[key] = sys.intern(key)
+                    key = interned
+                    if len(value) <= MAX_INTERNED_VALUE_LEN:
+                        interned = self.v_intern.get(value)
+                        if interned is None:
+                            interned = self.v_intern[value] = sys.intern(value)
+                        value = interned
+                    if self.tags is None:
+                        self.tags = {}
+                    self.tags[key] = value
+        
+        elif name == 'nd':
+            if self.current == 'way':
+                self.children.append(int(attrs['ref']))
+        
+        elif name == 'node':
+            self.current = name
+            self.current_id = int(attrs['id'])
+            self.node_ids.append(self.current_id)
+            self.lats.append(float(attrs['lat']))
+            self.lons.append(float(attrs['lon']))
+            # Most nodes are bare geometry; their tag dict is only created
+            # when a first tag arrives
+            self.tags = None
+        
+        elif name == 'way' or name == 'relation':
+            self.current = name
+            self.current_id = int(attrs['id'])
+            self.children = []
+            self.tags = {}
+        
+        elif name == 'member':
+            if self.current == 'relation':
+                self.children.append({
+                    'type': attrs.get('type'),
+                    'ref': int(attrs['ref']),
+                    'role': attrs.get('role')
+                })
+        
+        elif name == 'bounds' and self.bounds is None:
+            self.bounds = {
+                'minlat': float(attrs['minlat']),
+                'minlon': float(attrs['minlon']),
+                'maxlat': float(attrs['maxlat']),
+                'maxlon': float(attrs['maxlon'])
+            }
+    
+    def end(self, name):
+        if name != self.current:
+            return
+        
+        if self.tags:
+            self.tag_counts.update(self.tags.keys())
+        if name == 'node':
+            # Tags are kept only for the minority of nodes that have any
+            if self.tags:
+                self.tag_index[self.current_id] = self.tags
+        elif name == 'way':
+            self.ways[self.current_id] = {
+                'nodes': self.children,
+                'tags': self.tags
+            }
+        else:
+            self.relations[self.current_id] = {
+                'members': self.children,
+                'tags': self.tags
+            }
+        
+        self.current = None
+        self.children = None
+        self.tags = None
+    
+    def parser(self):
+        """Create an expat parser wired to this handler."""
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        return parser
+    
+    def feed(self, stream):
+        """Parse a binary stream in PARSE_CHUNK_SIZE pieces."""
+        parser = self.parser()
+        for chunk in iter(lambda: stream.read(PARSE_CHUNK_SIZE), b''):
+            parser.Parse(chunk, False)
+        parser.Parse(b'', True)
+    
+    def parse_file(self, path):
+        """Parse a file on disk straight from a read-only memory map.
+        
+        expat reads the mapped pages through the buffer protocol, so the file
+        is never copied into Python bytes objects.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be mapped; let expat report the error
+                return self.feed(f)
+            with _map_file(f) as mm:
+                self.parser().Parse(mm, True)
+    
+    def result(self):
+        """Parsed structures, with coordinates packed into arrays."""
+        return {
+            'ids': np.asarray(self.node_ids, dtype=np.int64),
+            'lats': np.asarray(self.lats, dtype=np.float64),
+            'lons': np.asarray(self.lons, dtype=np.float64),
+            'tag_index': self.tag_index,
+            'ways': self.ways,
+            'relations': self.relations,
+            'bounds': self.bounds,
+            'tag_counts': self.tag_counts
+        }
+
+def _map_file(f):
+    """Read-only memory map of an open file, advised for sequential reading."""
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+# Element kinds in the Parquet tag table
+_TAG_KINDS = ('node', 'way', 'relation')
+
+def _parse_cache_paths(cache_key):
+    """Parquet snapshot files for a source file, keyed by its content digest."""
+    return {
+        part: os.path.join(PARSE_CACHE_FOLDER, f'{cache_key}.{part}.parquet')
+        for part in ('nodes', 'ways', 'relations', 'tags')
+    }
+
+def _write_parse_cache(cache_key, file_size, data, tag_counts):
+    """Snapshot parsed data to column-oriented Parquet files.
+    
+    The nodes file carries the source size and is written last, so a
+    partially written snapshot is never treated as valid.
+    """
+    if pq is None:
+        return
+    
+    paths = _parse_cache_paths(cache_key)
+    tag_kinds, tag_ids, tag_keys, tag_values = [], [], [], []
+    containers = (
+        data['nodes']['tag_index'].items(),
+        ((way_id, way['tags']) for way_id, way in data['ways'].items()),
+        ((relation_id, relation['tags']) for relation_id, relation in data['relations'].items())
+    )
+    for kind, items in enumerate(containers):
+        for element_id, tags in items:
+            for key, value in tags.items():
+                tag_kinds.append(kind)
+                tag_ids.append(element_id)
+                tag_keys.append(key)
+                tag_values.append(value)
+    
+    tables = {
+        'ways': pa.table({
+            'id': pa.array(list(data['ways']), pa.int64()),
+            'nodes': pa.array([way['nodes'] for way in data['ways'].values()], pa.list_(pa.int64()))
+        }),
+        'relations': pa.table({
+            'id': pa.array(list(data['relations']), pa.int64()),
+            'members': pa.array(
+                [relation['members'] for relation in data['relations'].values()],
+                pa.list_(pa.struct([('type', pa.string()), ('ref', pa.int64()), ('role', pa.string())]))
+            )
+        }),
+        'tags': pa.table({
+            'kind': pa.array(tag_kinds, pa.int8()),
+            'id': pa.array(tag_ids, pa.int64()),
+            'key': pa.array(tag_keys, pa.string()),
+            'value': pa.array(tag_values, pa.string())
+        }),
+        'nodes': pa.table({
+            'id': data['nodes']['ids'],
+            'lat': data['nodes']['lats'],
+            'lon': data['nodes']['lons']
+        }).replace_schema_metadata({
+            'source_size': str(file_size),
+            'bounds': json.dumps(data['bounds']),
+            'tag_counts': json.dumps(list(tag_counts.items())),
+            'sample_ids': json.dumps(data['nodes']['sample_ids'].tolist())
+        })
+    }
+    
+    try:
+        os.makedirs(PARSE_CACHE_FOLDER, exist_ok=True)
+        for part, table in tables.items():
+            tmp_path = paths[part] + '.tmp'
+            pq.write_table(table, tmp_path, compression='zstd',
+                           use_dictionary=['key', 'value'],
+                           use_byte_stream_split=['lat', 'lon'] if part == 'nodes' else False)
+            os.replace(tmp_path, paths[part])
+    except (OSError, pa.ArrowException):
+        # The snapshot is only an accelerator; parsing already succeeded
+        pass
+
+def _read_parse_cache(cache_key, file_size):
+    """Load a parser result from a valid Parquet snapshot, or return None."""
+    if pq is None:
+        return None
+    
+    paths = _parse_cache_paths(cache_key)
+    if not all(os.path.exists(p) for p in paths.values()):
+        return None
+    
+    try:
+        nodes = pq.read_table(paths['nodes'])
+        meta = nodes.schema.metadata or {}
+        if (meta.get(b'source_size') != str(file_size).encode()
+                or b'sample_ids' not in meta):
+            return None
+        
+        ways_table = pq.read_table(paths['ways'])
+        relations_table = pq.read_table(paths['relations'])
+        tags = pq.read_table(paths['tags'], read_dictionary=['key', 'value']).combine_chunks()
+    except (OSError, pa.ArrowException):
+        return None
+    
+    ways = {
+        way_id: {'nodes': refs, 'tags': {}}
+        for way_id, refs in zip(ways_table['id'].to_pylist(), ways_table['nodes'].to_pylist())
+    }
+    relations = {
+        relation_id: {'members': members, 'tags': {}}
+        for relation_id, members in zip(relations_table['id'].to_pylist(),
+                                        relations_table['members'].to_pylist())
+    }
+    
+    # Dictionary-encoded keys and values decode to one shared string per
+    # distinct text, like the interned strings of a fresh parse
+    key_column = tags['key'].chunk(0) if tags.num_rows else None
+    value_column = tags['value'].chunk(0) if tags.num_rows else None
+    tag_index = {}
+    if key_column is not None:
+        key_strings = key_column.dictionary.to_pylist()
+        value_strings = value_column.dictionary.to_pylist()
+        targets = (tag_index, ways, relations)
+        for kind, element_id, k, v in zip(tags['kind'].to_pylist(), tags['id'].to_pylist(),
+                                          key_column.indices.to_pylist(), value_column.indices.to_pylist()):
+            if kind == 0:
+                element_tags = tag_index.setdefault(element_id, {})
+            else:
+                element_tags = targets[kind][element_id]['tags']
+            element_tags[key_strings[k]] = value_strings[v]
+    
+    return {
+        'ids': nodes['id'].to_numpy(),
+        'lats': nodes['lat'].to_numpy(),
+        'lons': nodes['lon'].to_numpy(),
+        'tag_index': tag_index,
+        'ways': ways,
+        'relations': relations,
+        'bounds': json.loads(meta[b'bounds']),
+        'tag_counts': Counter(dict(json.loads(meta[b'tag_counts']))),
+        'sample_ids': np.asarray(json.loads(meta[b'sample_ids']), dtype=np.int64)
+    }
+
 class OSMProcessor:
     """OSM file processor for web interface."""
     
     def __init__(self):
         self.current_data = None
         self.analysis_results = None
+        self.category_index = None
+        # Serialized /api/map_data bodies by filter bitmask; they live and
+        # die with this processor and are reset by each new upload
+        self.map_cache = {}
+        self.node_coords = None
+        self.bounds_arr = None
+        self._tag_counts = Counter()
     
-    def parse_osm_file(self, file_path):
-        """Parse OSM file and return structured data."""
+    def parse_osm_file(self, source, file_name=None, cache_key=None):
+        """Parse OSM file and return structured data.
+        
+        With ``cache_key``, a digest of the file content, the result is loaded
+        from or snapshotted to the Parquet parse cache.
+        """
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            
-            data = {
-                'nodes': {},
-                'ways': {},
-                'relations': {},
-                'bounds': None,
-                'metadata': {
-                    'file_name': Path(file_path).name,
-                    'file_size': Path(file_path).stat().st_size,
-                    'processed_at': datetime.now().isoformat()
-                }
-            }
-            
-            # Get bounds if available
-            bounds = root.find('bounds')
-            if bounds is not None:
-                data['bounds'] = {
-                    'minlat': float(bounds.get('minlat')),
-                    'minlon': float(bounds.get('minlon')),
-                    'maxlat': float(bounds.get('maxlat')),
-                    'maxlon': float(bounds.get('maxlon'))
-                }
-            
-            # Parse nodes
-            for node in root.findall('node'):
-                node_id = int(node.get('id'))
-                lat = float(node.get('lat'))
-                lon = float(node.get('lon'))
-                
-                tags = {}
-                for tag in node.findall('tag'):
-                    key = tag.get('k')
-                    value = tag.get('v')
-                    if key and value:
-                        tags[key] = value
-                
-                data['nodes'][node_id] = {
-                    'lat': lat,
-                    'lon': lon,
-                    'tags': tags
-                }
+            file_name = file_name or Path(source).name
+            stat = Path(source).stat()
             
-            # Parse ways
-            for way in root.findall('way'):
-                way_id = int(way.get('id'))
-                
-                # Get nodes
-                nodes = []
-                for nd in way.findall('nd'):
-                    node_id = int(nd.get('ref'))
-                    nodes.append(node_id)
-                
-                # Get tags
-                tags = {}
-                for tag in way.findall('tag'):
-                    key = tag.get('k')
-                    value = tag.get('v')
-                    if key and value:
-                        tags[key] = value
-                
-                data['ways'][way_id] = {
-                    'nodes': nodes,
-                    'tags': tags
-                }
+            # Files uploaded again load from the Parquet snapshot of their last parse
+            cached = _read_parse_cache(cache_key, stat.st_size) if cache_key else None
+            if cached is not None:
+                return self._store_parsed(cached, file_name, stat.st_size)
             
-            # Parse relations
-            for relation in root.findall('relation'):
-                relation_id = int(relation.get('id'))
-                
-                # Get members
-                members = []
-                for member in relation.findall('member'):
-                    members.append({
-                        'type': member.get('type'),
-                        'ref': int(member.get('ref')),
-                        'role': member.get('role')
-                    })
-                
-                # Get tags
-                tags = {}
-                for tag in relation.findall('tag'):
-                    key = tag.get('k')
-                    value = tag.get('v')
-                    if key and value:
-                        tags[key] = value
-                
-                data['relations'][relation_id] = {
-                    'members': members,
-                    'tags': tags
-                }
+            # The file goes through expat in one pass; no element objects
+            # are built, only the final dicts and coordinate lists
+            handler = _OSMHandler()
+            handler.parse_file(source)
+            data = self._store_parsed(handler.result(), file_name, stat.st_size)
             
-            self.current_data = data
+            if cache_key:
+                _write_parse_cache(cache_key, stat.st_size, data, self._tag_counts)
             return data
             
         except Exception as e:
             raise Exception(f"Error parsing OSM file: {str(e)}")
     
+    def _store_parsed(self, parsed, file_name, file_size):
+        """Make a parser result (or cache snapshot) the current data set."""
+        data = {
+            'nodes': None,
+            'ways': parsed['ways'],
+            'relations': parsed['relations'],
+            'bounds': parsed['bounds'],
+            'metadata': {
+                'file_name': file_name,
+                'file_size': file_size,
+                'processed_at': datetime.now().isoformat()
+            }
+        }
+        
+        # Keep the node arrays sorted by id so coordinates can be looked up
+        # with searchsorted; lats/lons are column views of one (n, 2) array
+        ids = parsed['ids']
+        coords = np.stack([parsed['lats'], parsed['lons']], axis=1)
+        # The export sample lists nodes in file order, so it is taken before
+        # sorting (a cache snapshot stores the sample of the original parse)
+        if 'sample_ids' in parsed:
+            sample_ids = parsed['sample_ids']
+        else:
+            sample_ids = ids[:NODES_SAMPLE_SIZE].copy()
+        if ids.size > 1 and np.any(ids[1:] < ids[:-1]):
+            order = np.argsort(ids, kind='stable')
+            ids, coords = ids[order], coords[order]
+        
+        data['nodes'] = {
+            'ids': ids,
+            'lats': coords[:, 0],
+            'lons': coords[:, 1],
+            'tag_index': parsed['tag_index'],
+            'sample_ids': sample_ids
+        }
+        
+        self.node_coords = coords
+        self._tag_counts = parsed['tag_counts']
+        bounds = data['bounds']
+        self.bounds_arr = None if bounds is None else np.array(
+            [bounds['minlat'], bounds['minlon'], bounds['maxlat'], bounds['maxlon']])
+        
+        self.current_data = data
+        self.category_index = None
+        self.map_cache = {}
+        return data
+    
+    def adopt(self, other):
+        """Take over the parsed data and analysis of a processor from a worker."""
+        self.current_data = other.current_data
+        self.analysis_results = other.analysis_results
+        self.category_index = other.category_index
+        self.node_coords = other.node_coords
+        self.bounds_arr = other.bounds_arr
+        self._tag_counts = other._tag_counts
+        self.map_cache = {}
+    
+    def _scan_tags(self, tag_dicts, is_way, way_types, amenity_details):
+        """Update type and amenity counters from each tag dict in one pass."""
+        for tags in tag_dicts:
+            if is_way:
+                # Count by main tag types
+                if 'building' in tags:
+                    way_types['buildings'] = way_types.get('buildings', 0) + 1
+                if 'highway' in tags:
+                    way_types['roads'] = way_types.get('roads', 0) + 1
+                    highway_type = tags['highway']
+                    way_types[f'highway_{highway_type}'] = way_types.get(f'highway_{highway_type}', 0) + 1
+                if 'waterway' in tags:
+                    way_types['waterways'] = way_types.get('waterways', 0) + 1
+            
+            if 'amenity' in tags:
+                way_types['amenities'] = way_types.get('amenities', 0) + 1
+                
+                # Detailed amenity analysis
+                category = AMENITY_TO_CATEGORY.get(tags['amenity'])
+                if category:
+                    amenity_details[category] += 1
+            
+            if is_way:
+                if 'natural' in tags:
+                    way_types['natural'] = way_types.get('natural', 0) + 1
+                if 'landuse' in tags:
+                    way_types['landuse'] = way_types.get('landuse', 0) + 1
+    
     def analyze_data(self, data):
         """Analyze OSM data and generate statistics."""
         if not data:
@@ -150,10 +531,10 @@ class OSMProcessor:
         
         analysis = {
             'basic_stats': {
-                'nodes': len(data['nodes']),
+                'nodes': len(data['nodes']['ids']),
                 'ways': len(data['ways']),
                 'relations': len(data['relations']),
-                'total_elements': len(data['nodes']) + len(data['ways']) + len(data['relations'])
+                'total_elements': len(data['nodes']['ids']) + len(data['ways']) + len(data['relations'])
             },
             'way_analysis': {},
             'tag_analysis': {},
@@ -161,83 +542,33 @@ class OSMProcessor:
             'quality_metrics': {}
         }
         
-        # Way type analysis
+        # Way types and amenity categories are gathered in a single walk over
+        # each element container; tag keys were already counted while parsing
         way_types = {}
-        amenity_details = {}
+        amenity_details = Counter()
+        tag_counts = self._tag_counts
         
-        for way_data in data['ways'].values():
-            tags = way_data['tags']
-            
-            # Count by main tag types
-            if 'building' in tags:
-                way_types['buildings'] = way_types.get('buildings', 0) + 1
-            if 'highway' in tags:
-                way_types['roads'] = way_types.get('roads', 0) + 1
-                highway_type = tags['highway']
-                way_types[f'highway_{highway_type}'] = way_types.get(f'highway_{highway_type}', 0) + 1
-            if 'waterway' in tags:
-                way_types['waterways'] = way_types.get('waterways', 0) + 1
-            if 'amenity' in tags:
-                way_types['amenities'] = way_types.get('amenities', 0) + 1
-                
-                # Detailed amenity analysis for ways
-                amenity = tags['amenity']
-                if amenity in ['school', 'university', 'college', 'kindergarten']:
-                    amenity_details['education'] = amenity_details.get('education', 0) + 1
-                elif amenity in ['hospital', 'clinic', 'pharmacy', 'doctors']:
-                    amenity_details['healthcare'] = amenity_details.get('healthcare', 0) + 1
-                elif amenity in ['museum', 'theatre', 'cinema', 'library', 'arts_centre']:
-                    amenity_details['culture'] = amenity_details.get('culture', 0) + 1
-                elif amenity in ['hotel', 'guest_house', 'hostel', 'tourist_info']:
-                    amenity_details['tourism'] = amenity_details.get('tourism', 0) + 1
-                elif amenity in ['restaurant', 'cafe', 'bar', 'fast_food']:
-                    amenity_details['food'] = amenity_details.get('food', 0) + 1
-                elif amenity in ['shop', 'supermarket', 'marketplace']:
-                    amenity_details['shopping'] = amenity_details.get('shopping', 0) + 1
-            if 'natural' in tags:
-                way_types['natural'] = way_types.get('natural', 0) + 1
-            if 'landuse' in tags:
-                way_types['landuse'] = way_types.get('landuse', 0) + 1
+        # Point amenities are merged in after the ways so key order matches
+        # the per-container reports
+        node_types = {}
+        node_details = Counter()
+        self._scan_tags(data['nodes']['tag_index'].values(), False, node_types, node_details)
+        self._scan_tags((way_data['tags'] for way_data in data['ways'].values()), True,
+                        way_types, amenity_details)
         
-        analysis['way_analysis'] = way_types
+        for key, count in node_types.items():
+            way_types[key] = way_types.get(key, 0) + count
+        amenity_details.update(node_details)
         
-        # Analyze nodes for amenities (point features)
-        for node_data in data['nodes'].values():
-            tags = node_data['tags']
-            if 'amenity' in tags:
-                way_types['amenities'] = way_types.get('amenities', 0) + 1
-                
-                # Detailed amenity analysis for nodes
-                amenity = tags['amenity']
-                if amenity in ['school', 'university', 'college', 'kindergarten']:
-                    amenity_details['education'] = amenity_details.get('education', 0) + 1
-                elif amenity in ['hospital', 'clinic', 'pharmacy', 'doctors']:
-                    amenity_details['healthcare'] = amenity_details.get('healthcare', 0) + 1
-                elif amenity in ['museum', 'theatre', 'cinema', 'library', 'arts_centre']:
-                    amenity_details['culture'] = amenity_details.get('culture', 0) + 1
-                elif amenity in ['hotel', 'guest_house', 'hostel', 'tourist_info']:
-                    amenity_details['tourism'] = amenity_details.get('tourism', 0) + 1
-                elif amenity in ['restaurant', 'cafe', 'bar', 'fast_food']:
-                    amenity_details['food'] = amenity_details.get('food', 0) + 1
-                elif amenity in ['shop', 'supermarket', 'marketplace']:
-                    amenity_details['shopping'] = amenity_details.get('shopping', 0) + 1
+        analysis['way_analysis'] = way_types
         
         # Add detailed amenity statistics
         analysis['amenity_details'] = amenity_details
         
         # Tag analysis
-        all_tags = set()
-        tag_counts = {}
-        
-        for element_type in ['nodes', 'ways', 'relations']:
-            for element_data in data[element_type].values():
-                for tag_key in element_data.get('tags', {}):
-                    all_tags.add(tag_key)
-                    tag_counts[tag_key] = tag_counts.get(tag_key, 0) + 1
-        
         analysis['tag_analysis'] = {
-            'unique_tags': len(all_tags),
-            'most_common_tags': dict(sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:20])
+            'unique_tags': len(tag_counts),
+            'most_common_tags': dict(tag_counts.most_common(20))
         }
         
         # Quality metrics
@@ -249,22 +580,71 @@ class OSMProcessor:
         
         # Area calculation if bounds available
         if data.get('bounds'):
-            bounds = data['bounds']
-            lat_diff = bounds['maxlat'] - bounds['minlat']
-            lon_diff = bounds['maxlon'] - bounds['minlon']
-            avg_lat = (bounds['maxlat'] + bounds['minlat']) / 2
-            
-            # Rough conversion to square kilometers
-            lat_km = lat_diff * 111.32
-            lon_km = lon_diff * 111.32 * abs(avg_lat / 180 * 3.14159)
-            area_km2 = lat_km * lon_km
+            area_km2 = self._bounds_area_km2()
             
             analysis['quality_metrics']['estimated_area_km2'] = area_km2
             analysis['quality_metrics']['elements_per_km2'] = analysis['basic_stats']['total_elements'] / area_km2 if area_km2 > 0 else 0
         
+        self.category_index = self._build_category_index(data)
         self.analysis_results = analysis
         return analysis
     
+    def _bounds_area_km2(self):
+        """Rough area of the parsed bounds in square kilometers."""
+        spans = self.bounds_arr[2:] - self.bounds_arr[:2]
+        avg_lat = self.bounds_arr[[0, 2]].mean()
+        km = spans * 111.32 * np.array([1.0, abs(avg_lat / 180 * 3.14159)])
+        return float(np.prod(km))
+    
+    def _build_category_index(self, data):
+        """Index way and node positions by map filter category.
+        
+        Positions refer to file order (way_ids / node_ids), so the union of
+        several categories can be sorted back into the original order.
+        """
+        way_positions = {name: [] for name in ('buildings', 'roads', 'waterways', *AMENITY_CATEGORIES)}
+        for position, way_data in enumerate(data['ways'].values()):
+            tags = way_data['tags']
+            if 'building' in tags:
+                way_positions['buildings'].append(position)
+            if 'highway' in tags:
+                way_positions['roads'].append(position)
+            if 'waterway' in tags:
+                way_positions['waterways'].append(position)
+            if 'amenity' in tags:
+                category = AMENITY_TO_CATEGORY.get(tags['amenity'])
+                if category:
+                    way_positions[category].append(position)
+        
+        node_positions = {category: [] for category in AMENITY_CATEGORIES}
+        for position, tags in enumerate(data['nodes']['tag_index'].values()):
+            if 'amenity' in tags:
+                category = AMENITY_TO_CATEGORY.get(tags['amenity'])
+                if category:
+                    node_positions[category].append(position)
+        
+        return {
+            'way_ids': np.fromiter(data['ways'].keys(), dtype=np.int64, count=len(data['ways'])),
+            'ways': {name: np.asarray(p, dtype=np.int64) for name, p in way_positions.items()},
+            'node_ids': np.fromiter(data['nodes']['tag_index'].keys(), dtype=np.int64,
+                                    count=len(data['nodes']['tag_index'])),
+            'nodes': {name: np.asarray(p, dtype=np.int64) for name, p in node_positions.items()}
+        }
+    
+    def _nodes_sample(self, count):
+        """Return the first nodes in file order as id -> {'lat', 'lon', 'tags'} records."""
+        nodes = self.current_data['nodes']
+        sample_ids = nodes['sample_ids'][:count]
+        positions = np.searchsorted(nodes['ids'], sample_ids)
+        return {
+            int(node_id): {
+                'lat': float(nodes['lats'][position]),
+                'lon': float(nodes['lons'][position]),
+                'tags': nodes['tag_index'].get(int(node_id), {})
+            }
+            for node_id, position in zip(sample_ids, positions)
+        }
+    
     def export_results(self, format_type='json'):
         """Export analysis results in specified format."""
         if not self.analysis_results or not self.current_data:
@@ -280,14 +660,18 @@ class OSMProcessor:
                 'metadata': self.current_data['metadata'],
                 'analysis': self.analysis_results,
                 'raw_data_summary': {
-                    'nodes_sample': dict(list(self.current_data['nodes'].items())[:5]),  # First 5 nodes
+                    'nodes_sample': self._nodes_sample(NODES_SAMPLE_SIZE),  # First 5 nodes
                     'ways_sample': dict(list(self.current_data['ways'].items())[:5]),    # First 5 ways
                     'relations_sample': dict(list(self.current_data['relations'].items())[:5])  # First 5 relations
                 }
             }
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                with open(filepath, 'wb') as f:
+                    f.write(orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(export_data, f, indent=2, ensure_ascii=False)
             
             return filepath
         
@@ -316,15 +700,122 @@ class OSMProcessor:
         
         return None
 
-# Initialize processor
-processor = OSMProcessor()
+# One processor per browser session, so concurrent users never share data.
+# They live in this process only: run a single worker (threads are fine) or
+# route each session to the same worker with sticky sessions.
+PROCESSORS = OrderedDict()
+_processors_lock = threading.Lock()
+
+# Uploads are parsed and analyzed off the request thread; JOBS maps a job id
+# to its upload state and the session it belongs to. The executor is started
+# on the first upload, and each of its workers parses one file sequentially
+# so concurrent uploads never run more than cpu_count processes.
+_executor = None
+_executor_lock = threading.Lock()
+JOBS = {}
+JOB_TTL_SECONDS = 600  # finished jobs nobody polled are dropped after this
+
+def _get_executor():
+    """Return the upload executor, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _executor
+
+def _sweep_jobs():
+    """Forget finished jobs whose status was never collected."""
+    cutoff = time.monotonic() - JOB_TTL_SECONDS
+    for job_id, job in list(JOBS.items()):
+        if job['finished'] and job['finished_at'] < cutoff:
+            JOBS.pop(job_id, None)
+
+def _save_upload(file, path):
+    """Write an uploaded file to disk and return the SHA-256 of its content."""
+    digest = hashlib.sha256()
+    with open(path, 'wb') as out:
+        for chunk in iter(lambda: file.stream.read(PARSE_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+def _parse_and_analyze(path, file_name, cache_key):
+    """Executor task: parse and analyze one uploaded file."""
+    processor = OSMProcessor()
+    data = processor.parse_osm_file(path, file_name, cache_key=cache_key)
+    processor.analyze_data(data)
+    return processor
+
+def _finish_job(job, future):
+    """Hand a finished job's result to its session processor.
+    
+    Only the error is kept on the job afterwards; the parsed data is owned
+    by the session processor.
+    """
+    error = future.exception()
+    try:
+        if error is None:
+            with _processors_lock:
+                target = PROCESSORS.get(job['pid'])
+            if target is not None:
+                target.adopt(future.result())
+    finally:
+        if not job['keep']:
+            try:
+                os.remove(job['path'])
+            except OSError:
+                pass
+        job['error'] = error
+        job['finished_at'] = time.monotonic()
+        job['finished'] = True
+
+def _current_processor(create=False):
+    """Return the processor for this session.
+    
+    With ``create`` a session id is assigned and its processor registered;
+    otherwise sessions without one get an empty, unregistered processor.
+    """
+    pid = session.get('pid')
+    if pid is None and create:
+        pid = session['pid'] = uuid.uuid4().hex
+    
+    with _processors_lock:
+        proc = PROCESSORS.get(pid)
+        if proc is not None:
+            PROCESSORS.move_to_end(pid)
+        elif create:
+            proc = PROCESSORS[pid] = OSMProcessor()
+            while len(PROCESSORS) > MAX_SESSIONS:
+                PROCESSORS.popitem(last=False)
+        else:
+            proc = OSMProcessor()
+    return proc
+
+@app.before_request
+def check_session_evicted():
+    """Send a session whose processor was dropped back to the upload page."""
+    pid = session.get('pid')
+    if pid is None or request.endpoint in ('index', 'upload_file', 'job_progress', 'job_status', 'static'):
+        return None
+    with _processors_lock:
+        if pid in PROCESSORS:
+            return None
+    
+    session.pop('pid')
+    # Dropped for a newer session (see MAX_SESSIONS), or never seen by this
+    # process after a restart
+    message = 'Your uploaded data is no longer available on the server. Please upload the file again.'
+    if request.path.startswith('/api/'):
+        return _json({'error': message}, 404)
+    flash(message)
+    return redirect(url_for('index'))
 
 @app.context_processor
 def inject_globals():
     """Inject global variables into all templates."""
+    processor = _current_processor()
     return {
-        'analysis_results': processor.analysis_results,
-        'current_data': processor.current_data
+        'analysis_results': processor.analysis_results
     }
 
 @app.route('/')
@@ -335,6 +826,7 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle file upload."""
+    _current_processor(create=True)
     if 'file' not in request.files:
         flash('No file selected')
         return redirect(request.url)
@@ -346,28 +838,70 @@ def upload_file():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
         
-        try:
-            # Process the file
-            data = processor.parse_osm_file(filepath)
-            analysis = processor.analyze_data(data)
-            
-            flash(f'File "{filename}" uploaded and analyzed successfully!')
-            return redirect(url_for('results'))
-            
-        except Exception as e:
-            flash(f'Error processing file: {str(e)}')
-            return redirect(url_for('index'))
+        # The worker process needs the upload on disk; it is kept under its
+        # own name only when KEEP_UPLOADS is set
+        if KEEP_UPLOADS:
+            filepath = os.path.join(UPLOAD_FOLDER, filename)
+        else:
+            fd, filepath = tempfile.mkstemp(suffix='.osm', dir=UPLOAD_FOLDER)
+            os.close(fd)
+        # The content digest keys the parse cache, so the same file uploaded
+        # again is loaded from its snapshot whatever its name or upload time
+        cache_key = _save_upload(file, filepath)
+        
+        _sweep_jobs()
+        job_id = uuid.uuid4().hex
+        job = JOBS[job_id] = {
+            'pid': session['pid'],
+            'filename': filename,
+            'path': filepath,
+            'keep': KEEP_UPLOADS,
+            'finished': False
+        }
+        future = _get_executor().submit(_parse_and_analyze, filepath, filename, cache_key)
+        future.add_done_callback(lambda future: _finish_job(job, future))
+        return redirect(url_for('job_progress', job_id=job_id))
     
     else:
         flash('Invalid file type. Please upload .osm or .xml files only.')
         return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def job_progress(job_id):
+    """Progress page that polls the status of an upload job."""
+    if job_id not in JOBS:
+        flash('Unknown upload job.')
+        return redirect(url_for('index'))
+    
+    return render_template('progress.html', job_id=job_id, filename=JOBS[job_id]['filename'])
+
+@app.route('/status/<job_id>')
+def job_status(job_id):
+    """Report whether an upload job is still running, finished or failed."""
+    job = JOBS.get(job_id)
+    if job is None or job['pid'] != session.get('pid'):
+        return _json({'error': 'Unknown job'}, 404)
+    
+    # A job counts as finished once its result reached the session processor
+    if not job['finished']:
+        return _json({'status': 'running'})
+    
+    # Terminal states are reported once, together with the flash message
+    JOBS.pop(job_id, None)
+    error = job['error']
+    if error is not None:
+        flash(f'Error processing file: {str(error)}')
+        return _json({'status': 'error', 'redirect': url_for('index')})
+    
+    filename = job['filename']
+    flash(f'File "{filename}" uploaded and analyzed successfully!')
+    return _json({'status': 'done', 'redirect': url_for('results')})
+
 @app.route('/results')
 def results():
     """Display analysis results."""
+    processor = _current_processor()
     if not processor.analysis_results:
         flash('No analysis results available. Please upload a file first.')
         return redirect(url_for('index'))
@@ -379,10 +913,11 @@ def results():
 @app.route('/api/data')
 def api_data():
     """API endpoint for analysis data."""
+    processor = _current_processor()
     if not processor.analysis_results:
-        return jsonify({'error': 'No data available'}), 404
+        return _json({'error': 'No data available'}, 404)
     
-    return jsonify({
+    return _json({
         'analysis': processor.analysis_results,
         'metadata': processor.current_data['metadata']
     })
@@ -390,6 +925,7 @@ def api_data():
 @app.route('/export/<format_type>')
 def export_data(format_type):
     """Export data in specified format."""
+    processor = _current_processor()
     if format_type not in ['json', 'csv']:
         flash('Invalid export format')
         return redirect(url_for('results'))
@@ -408,32 +944,38 @@ def export_data(format_type):
 @app.route('/map')
 def map_view():
     """Simple map view."""
+    processor = _current_processor()
     if not processor.current_data:
         flash('No data available. Please upload a file first.')
         return redirect(url_for('index'))
     
     return render_template('map.html', 
                          bounds=processor.current_data.get('bounds'),
-                         way_analysis=processor.analysis_results['way_analysis'],
-                         all_data=processor.current_data)
+                         way_analysis=processor.analysis_results['way_analysis'])
 
 @app.route('/api/map_data')
 def api_map_data():
     """API endpoint for map data with filtering."""
+    processor = _current_processor()
     if not processor.current_data:
-        return jsonify({'error': 'No data available'}), 404
-    
-    # Get filter parameters
-    show_buildings = request.args.get('buildings', 'true').lower() == 'true'
-    show_roads = request.args.get('roads', 'true').lower() == 'true'
-    show_waterways = request.args.get('waterways', 'false').lower() == 'true'
-    show_amenities = request.args.get('amenities', 'false').lower() == 'true'
-    show_education = request.args.get('education', 'false').lower() == 'true'
-    show_healthcare = request.args.get('healthcare', 'false').lower() == 'true'
-    show_culture = request.args.get('culture', 'false').lower() == 'true'
-    show_tourism = request.args.get('tourism', 'false').lower() == 'true'
-    show_food = request.args.get('food', 'false').lower() == 'true'
-    show_shopping = request.args.get('shopping', 'false').lower() == 'true'
+        return _json({'error': 'No data available'}, 404)
+    
+    # Encode the filter selection as a bitmask so repeated combinations
+    # are served from the render cache
+    mask = 0
+    for bit, (name, default) in enumerate(MAP_FILTERS):
+        if request.args.get(name, default).lower() == 'true':
+            mask |= 1 << bit
+    
+    body = processor.map_cache.get(mask)
+    if body is None:
+        body = processor.map_cache[mask] = _render_map(processor, mask)
+    return Response(body, mimetype='application/json')
+
+def _render_map(processor, mask):
+    """Serialized map data for one filter bitmask of the processor's upload."""
+    shown = {name for bit, (name, _) in enumerate(MAP_FILTERS) if mask >> bit & 1}
+    enabled_categories = shown.intersection(AMENITY_CATEGORIES)
     
     # Filter data based on selections
     filtered_data = {
@@ -441,65 +983,34 @@ def api_map_data():
         'nodes': {},
         'ways': {}
     }
+    index = processor.category_index
+    
+    # Ways matching any selected filter, as a union of precomputed positions
+    selected = [index['ways'][name] for name in ('buildings', 'roads', 'waterways') if name in shown]
+    if 'amenities' in shown:
+        selected.extend(index['ways'][category] for category in enabled_categories)
     
-    # Filter ways
-    for way_id, way_data in processor.current_data['ways'].items():
-        tags = way_data['tags']
-        include_way = False
-        
-        # Check if way matches any selected filters
-        if show_buildings and 'building' in tags:
-            include_way = True
-        elif show_roads and 'highway' in tags:
-            include_way = True
-        elif show_waterways and 'waterway' in tags:
-            include_way = True
-        elif show_amenities and 'amenity' in tags:
-            amenity_type = tags['amenity']
-            if show_education and amenity_type in ['school', 'university', 'college', 'kindergarten']:
-                include_way = True
-            elif show_healthcare and amenity_type in ['hospital', 'clinic', 'pharmacy', 'doctors']:
-                include_way = True
-            elif show_culture and amenity_type in ['museum', 'theatre', 'cinema', 'library', 'arts_centre']:
-                include_way = True
-            elif show_tourism and amenity_type in ['hotel', 'guest_house', 'hostel', 'tourist_info']:
-                include_way = True
-            elif show_food and amenity_type in ['restaurant', 'cafe', 'bar', 'fast_food']:
-                include_way = True
-            elif show_shopping and amenity_type in ['shop', 'supermarket', 'marketplace']:
-                include_way = True
-        
-        if include_way:
-            filtered_data['ways'][way_id] = way_data
-    
-    # Filter nodes (for amenities that are points)
-    for node_id, node_data in processor.current_data['nodes'].items():
-        tags = node_data['tags']
-        include_node = False
-        
-        if 'amenity' in tags:
-            amenity_type = tags['amenity']
-            if show_education and amenity_type in ['school', 'university', 'college', 'kindergarten']:
-                include_node = True
-            elif show_healthcare and amenity_type in ['hospital', 'clinic', 'pharmacy', 'doctors']:
-                include_node = True
-            elif show_culture and amenity_type in ['museum', 'theatre', 'cinema', 'library', 'arts_centre']:
-                include_node = True
-            elif show_tourism and amenity_type in ['hotel', 'guest_house', 'hostel', 'tourist_info']:
-                include_node = True
-            elif show_food and amenity_type in ['restaurant', 'cafe', 'bar', 'fast_food']:
-                include_node = True
-            elif show_shopping and amenity_type in ['shop', 'supermarket', 'marketplace']:
-                include_node = True
-        
-        if include_node:
-            filtered_data['nodes'][node_id] = node_data
-    
-    return jsonify(filtered_data)
+    ways = processor.current_data['ways']
+    for way_id in _union_ids(index['way_ids'], selected):
+        filtered_data['ways'][way_id] = ways[way_id]
+    
+    # Nodes (for amenities that are points)
+    nodes = processor.current_data['nodes']
+    matched_ids = _union_ids(index['node_ids'], [index['nodes'][category] for category in enabled_categories])
+    lats, lons = _node_coords(nodes, matched_ids)
+    for node_id, lat, lon in zip(matched_ids, lats.tolist(), lons.tolist()):
+        filtered_data['nodes'][node_id] = {
+            'lat': lat,
+            'lon': lon,
+            'tags': nodes['tag_index'][node_id]
+        }
+    
+    return _dumps(filtered_data)
 
 @app.route('/export_map_pdf')
 def export_map_pdf():
     """Export current map view as PDF."""
+    processor = _current_processor()
     if not processor.current_data:
         flash('No data available. Please upload a file first.')
         return redirect(url_for('index'))
@@ -534,7 +1045,8 @@ def export_map_pdf():
                 'tourism': show_tourism,
                 'food': show_food,
                 'shopping': show_shopping
-            }
+            },
+            processor.category_index
         )
         
         # Create PDF buffer
@@ -551,105 +1063,48 @@ def export_map_pdf():
         flash(f'PDF export failed: {str(e)}')
         return redirect(url_for('map_view'))
 
-def generate_simple_pdf_content(data, analysis, filters):
-    """Generate simple PDF content as plain text."""
-    
-    # Count filtered data
-    stats = {
-        'buildings': 0,
-        'roads': 0,
-        'waterways': 0,
-        'education': 0,
-        'healthcare': 0,
-        'culture': 0,
-        'tourism': 0,
-        'food': 0,
-        'shopping': 0
-    }
-    
-    # Count ways
-    for way_data in data['ways'].values():
-        tags = way_data['tags']
-        if filters['buildings'] and 'building' in tags:
-            stats['buildings'] += 1
-        elif filters['roads'] and 'highway' in tags:
-            stats['roads'] += 1
-        elif filters['waterways'] and 'waterway' in tags:
-            stats['waterways'] += 1
-    
-    # Count amenities
-    for node_data in data['nodes'].values():
-        if 'amenity' in node_data['tags']:
-            amenity = node_data['tags']['amenity']
-            if filters['education'] and amenity in ['school', 'university', 'college', 'kindergarten']:
-                stats['education'] += 1
-            elif filters['healthcare'] and amenity in ['hospital', 'clinic', 'pharmacy', 'doctors']:
-                stats['healthcare'] += 1
-            elif filters['culture'] and amenity in ['museum', 'theatre', 'cinema', 'library', 'arts_centre']:
-                stats['culture'] += 1
-            elif filters['tourism'] and amenity in ['hotel', 'guest_house', 'hostel', 'tourist_info']:
-                stats['tourism'] += 1
-            elif filters['food'] and amenity in ['restaurant', 'cafe', 'bar', 'fast_food']:
-                stats['food'] += 1
-            elif filters['shopping'] and amenity in ['shop', 'supermarket', 'marketplace']:
-                stats['shopping'] += 1
-    
-    # Generate active filters list
-    active_filters = []
-    for filter_name, is_active in filters.items():
-        if is_active:
-            active_filters.append(filter_name.replace('_', ' ').title())
-    
-    bounds = data.get('bounds')
-    bounds_text = ""
-    if bounds:
-        bounds_text = f"""
-    Southwest: {bounds['minlat']:.6f}, {bounds['minlon']:.6f}
-    Northeast: {bounds['maxlat']:.6f}, {bounds['maxlon']:.6f}
-    Size: {bounds['maxlat'] - bounds['minlat']:.6f}° × {bounds['maxlon'] - bounds['minlon']:.6f}°"""
-    
-    # Generate PDF content as plain text
-    content = f"""
+# Plain-text map report; each {} is filled by generate_simple_pdf_content
+REPORT_TEMPLATE = """
 ================================================================================
                             🗺️ OSM MAP EXPORT REPORT
 ================================================================================
 
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Source File: {data['metadata']['file_name']}
+Generated on: {}
+Source File: {}
 
 ================================================================================
 📊 MAP STATISTICS
 ================================================================================
 
 Infrastructure:
-    Buildings: {stats['buildings']:,}
-    Roads: {stats['roads']:,}
-    Waterways: {stats['waterways']:,}
+    Buildings: {}
+    Roads: {}
+    Waterways: {}
 
 Amenities:
-    Education: {stats['education']:,}
-    Healthcare: {stats['healthcare']:,}
-    Culture: {stats['culture']:,}
-    Tourism: {stats['tourism']:,}
-    Food & Drink: {stats['food']:,}
-    Shopping: {stats['shopping']:,}
+    Education: {}
+    Healthcare: {}
+    Culture: {}
+    Tourism: {}
+    Food & Drink: {}
+    Shopping: {}
 
 ================================================================================
 🔍 ACTIVE FILTERS
 ================================================================================
 
-Displayed Layers: {', '.join(active_filters) if active_filters else 'None'}
+Displayed Layers: {}
 
 ================================================================================
 📋 MAP INFORMATION
 ================================================================================
 
-File Name: {data['metadata']['file_name']}
-File Size: {data['metadata']['file_size'] / 1024 / 1024:.2f} MB
-Total Elements: {len(data['nodes']) + len(data['ways']) + len(data['relations']):,}
-Nodes: {len(data['nodes']):,}
-Ways: {len(data['ways']):,}
-Relations: {len(data['relations']):,}{bounds_text}
+File Name: {}
+File Size: {} MB
+Total Elements: {}
+Nodes: {}
+Ways: {}
+Relations: {}{}
 
 ================================================================================
 🎨 LEGEND
@@ -673,12 +1128,91 @@ Color Scheme:
 Generated by OSM Map Processor Web Application
 This report contains a summary of the OSM data analysis with current filter settings.
 """
+REPORT_PARTS = tuple(REPORT_TEMPLATE.split('{}'))
+
+FILTER_DISPLAY_NAMES = {
+    'buildings': 'Buildings',
+    'roads': 'Roads',
+    'waterways': 'Waterways',
+    'education': 'Education',
+    'healthcare': 'Healthcare',
+    'culture': 'Culture',
+    'tourism': 'Tourism',
+    'food': 'Food',
+    'shopping': 'Shopping'
+}
+
+def generate_simple_pdf_content(data, analysis, filters, category_index):
+    """Generate simple PDF content as plain text."""
+    
+    # Count filtered data
+    stats = {
+        'buildings': 0,
+        'roads': 0,
+        'waterways': 0,
+        'education': 0,
+        'healthcare': 0,
+        'culture': 0,
+        'tourism': 0,
+        'food': 0,
+        'shopping': 0
+    }
+    
+    # Count ways; each way counts once, under the first active filter it matches
+    counted = np.empty(0, dtype=np.int64)
+    for name in ('buildings', 'roads', 'waterways'):
+        if filters[name]:
+            positions = np.setdiff1d(category_index['ways'][name], counted, assume_unique=True)
+            stats[name] = len(positions)
+            counted = np.union1d(counted, positions)
+    
+    # Count amenities
+    for category in AMENITY_CATEGORIES:
+        if filters[category]:
+            stats[category] = len(category_index['nodes'][category])
+    
+    # Generate active filters list
+    active_filters = [FILTER_DISPLAY_NAMES[name] for name, is_active in filters.items() if is_active]
+    
+    bounds = data.get('bounds')
+    bounds_text = ""
+    if bounds:
+        bounds_text = f"""
+    Southwest: {bounds['minlat']:.6f}, {bounds['minlon']:.6f}
+    Northeast: {bounds['maxlat']:.6f}, {bounds['maxlon']:.6f}
+    Size: {bounds['maxlat'] - bounds['minlat']:.6f}° × {bounds['maxlon'] - bounds['minlon']:.6f}°"""
     
-    return content
+    # Fill the precomputed report fragments; values follow REPORT_PARTS order
+    values = (
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        data['metadata']['file_name'],
+        f"{stats['buildings']:,}",
+        f"{stats['roads']:,}",
+        f"{stats['waterways']:,}",
+        f"{stats['education']:,}",
+        f"{stats['healthcare']:,}",
+        f"{stats['culture']:,}",
+        f"{stats['tourism']:,}",
+        f"{stats['food']:,}",
+        f"{stats['shopping']:,}",
+        ', '.join(active_filters) if active_filters else 'None',
+        data['metadata']['file_name'],
+        f"{data['metadata']['file_size'] / 1024 / 1024:.2f}",
+        f"{len(data['nodes']['ids']) + len(data['ways']) + len(data['relations']):,}",
+        f"{len(data['nodes']['ids']):,}",
+        f"{len(data['ways']):,}",
+        f"{len(data['relations']):,}",
+        bounds_text
+    )
+    pieces = [REPORT_PARTS[0]]
+    for value, part in zip(values, REPORT_PARTS[1:]):
+        pieces += (value, part)
+    return ''.join(pieces)
 
 @app.route('/export_map_image')
 def export_map_image():
     """Export current map view as high-resolution image with legend and infographics."""
+    processor = _current_processor()
     if not processor.current_data:
         flash('No data available. Please upload a file first.')
         return redirect(url_for('map_view'))
@@ -749,6 +1283,7 @@ def export_map_image():
 @app.route('/screenshot_page')
 def screenshot_page():
     """Display a page specifically designed for taking screenshots."""
+    processor = _current_processor()
     if not processor.current_data:
         flash('No data available. Please upload a file first.')
         return redirect(url_for('map_view'))
@@ -5,15 +5,118 @@ Working GUI for OSM Map Processor with basic functionality.
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import xml.etree.ElementTree as ET
 import json
 import os
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
+import heapq
+import queue
+import sys
 import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from xml.parsers import expat
+
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+OSM_ELEMENTS = ('node', 'way', 'relation')
+UI_POLL_MS = 50  # how often the Tk thread drains messages from workers
+
+# Files up to this size are parsed whole: one C-level scan of the finished
+# tree is cheaper than a Python callback per streamed element
+IN_MEMORY_PARSE_MAX_BYTES = 16 * 1024 * 1024
+
+# Files of at least this size skip Element objects entirely and are counted
+# from raw expat callbacks
+EXPAT_COUNT_MIN_BYTES = 512 * 1024 * 1024
+
+if HAVE_LXML:
+    # Tag keys as plain strings, gathered by libxml2 without Element objects
+    TAG_KEYS_XPATH = ET.XPath('//tag/@k', smart_strings=False)
+
+# Parsing runs off the Tk thread so it neither competes with the mainloop
+# for the GIL nor freezes the UI; created on first use
+EXECUTOR = None
+
+def _gil_disabled() -> bool:
+    """True on free-threaded CPython (3.13+) running with the GIL off."""
+    return hasattr(sys, '_is_gil_enabled') and not sys._is_gil_enabled()
+
+def _get_executor():
+    """Return the shared parse executor, creating it on first use.
+    
+    Without a GIL a worker thread parses truly in parallel with the UI and
+    skips pickling; otherwise a worker process is needed for that.
+    SimpleOSMParser keeps no shared mutable state, so either is safe.
+    """
+    global EXECUTOR
+    if EXECUTOR is None:
+        if _gil_disabled():
+            EXECUTOR = ThreadPoolExecutor(max_workers=1)
+        else:
+            EXECUTOR = ProcessPoolExecutor(max_workers=1)
+    return EXECUTOR
+
+def _iter_osm_ends(osm_file_path):
+    """Yield end-of-element events for OSM elements and their tags.
+    
+    Handled top-level elements are released as the walk moves on, so memory
+    stays flat regardless of file size.
+    """
+    if HAVE_LXML:
+        # lxml filters tags in C and lets us drop already-seen siblings
+        for _, elem in ET.iterparse(osm_file_path, events=('end',), tag=OSM_ELEMENTS + ('tag',)):
+            yield elem
+            if elem.tag != 'tag':
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+    else:
+        context = ET.iterparse(osm_file_path, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'end':
+                yield elem
+                if elem.tag in OSM_ELEMENTS:
+                    root.clear()
+
+class _FastCounter:
+    """expat start-element handler that only counts elements and tag keys."""
+    
+    def __init__(self):
+        self.nodes = 0
+        self.ways = 0
+        self.relations = 0
+        self.tags = set()
+    
+    def start_element(self, name, attrs):
+        if name == 'node':
+            self.nodes += 1
+        elif name == 'tag':
+            key = attrs.get('k')
+            if key:
+                self.tags.add(sys.intern(key))
+        elif name == 'way':
+            self.ways += 1
+        elif name == 'relation':
+            self.relations += 1
 
 class SimpleOSMParser:
-    """Simple OSM XML parser without heavy dependencies."""
+    """OSM XML statistics parser.
+    
+    Uses lxml when it is installed and the stdlib XML parsers otherwise;
+    files of EXPAT_COUNT_MIN_BYTES or more are counted with raw expat.
+    """
     
     def __init__(self):
         self.nodes = {}
@@ -23,13 +126,13 @@ class SimpleOSMParser:
     def parse_file(self, osm_file_path: str) -> Dict[str, Any]:
         """Parse OSM file and return basic statistics."""
         try:
-            tree = ET.parse(osm_file_path)
-            root = tree.getroot()
-            
-            # Count elements
-            node_count = len([e for e in root if e.tag == 'node'])
-            way_count = len([e for e in root if e.tag == 'way'])
-            relation_count = len([e for e in root if e.tag == 'relation'])
+            file_size = Path(osm_file_path).stat().st_size
+            if file_size <= IN_MEMORY_PARSE_MAX_BYTES:
+                node_count, way_count, relation_count, tags = self._scan_tree(osm_file_path)
+            elif file_size >= EXPAT_COUNT_MIN_BYTES:
+                node_count, way_count, relation_count, tags = self._scan_expat(osm_file_path)
+            else:
+                node_count, way_count, relation_count, tags = self._scan_stream(osm_file_path)
             
             # Get some sample data
             sample_data = {
@@ -39,22 +142,57 @@ class SimpleOSMParser:
                 'total_elements': node_count + way_count + relation_count
             }
             
-            # Extract some tags
-            tags = set()
-            for element in root:
-                for child in element:
-                    if child.tag == 'tag':
-                        key = child.get('k')
-                        if key:
-                            tags.add(key)
-            
             sample_data['unique_tags'] = len(tags)
-            sample_data['sample_tags'] = sorted(list(tags))[:20]  # First 20 tags
+            sample_data['sample_tags'] = heapq.nsmallest(20, tags)  # First 20 tags
             
             return sample_data
             
         except Exception as e:
             raise Exception(f"Error parsing OSM file: {e}")
+    
+    def _scan_tree(self, osm_file_path: str) -> Tuple[int, int, int, set]:
+        """Count elements and tag keys of a small file from its full tree."""
+        root = ET.parse(osm_file_path).getroot()
+        
+        # One pass over the top-level children counts every element kind
+        counts = Counter(e.tag for e in root)
+        node_count = counts.get('node', 0)
+        way_count = counts.get('way', 0)
+        relation_count = counts.get('relation', 0)
+        
+        if HAVE_LXML:
+            tags = set(TAG_KEYS_XPATH(root))
+            tags.discard('')
+        else:
+            tags = {sys.intern(k) for k in (t.get('k') for t in root.iter('tag')) if k}
+        
+        return node_count, way_count, relation_count, tags
+    
+    def _scan_stream(self, osm_file_path: str) -> Tuple[int, int, int, set]:
+        """Count elements and tag keys of a large file in one streaming pass."""
+        counts = Counter()
+        tags = set()
+        
+        for elem in _iter_osm_ends(osm_file_path):
+            if elem.tag == 'tag':
+                key = elem.get('k')
+                if key:
+                    # Keys come from a small vocabulary; interned copies
+                    # hash once and compare by identity in the set
+                    tags.add(sys.intern(key))
+            else:
+                counts[elem.tag] += 1
+        
+        return counts['node'], counts['way'], counts['relation'], tags
+    
+    def _scan_expat(self, osm_file_path: str) -> Tuple[int, int, int, set]:
+        """Count elements and tag keys of a huge file without building Elements."""
+        counter = _FastCounter()
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = counter.start_element
+        with open(osm_file_path, 'rb') as f:
+            parser.ParseFile(f)
+        return counter.nodes, counter.ways, counter.relations, counter.tags
 
 class WorkingOSMGUI:
     """Working GUI for OSM processing."""
@@ -66,9 +204,17 @@ class WorkingOSMGUI:
         
         self.osm_file_path = None
         self.osm_data = None
+        self._file_size_mb = None  # memoized size of osm_file_path
+        self._analysis_report = ""  # text shown in the analysis tab and exported as TXT
+        
+        # Worker threads never touch Tk directly; they queue log lines and
+        # UI callbacks that the mainloop drains every UI_POLL_MS
+        self._log_q = queue.Queue()
+        self._ui_q = queue.Queue()
         self.parser = SimpleOSMParser()
         
         self.setup_ui()
+        self.root.after(UI_POLL_MS, self._drain_queues)
         
     def setup_ui(self):
         """Setup the user interface."""
@@ -202,6 +348,7 @@ class WorkingOSMGUI:
         if filename:
             self.file_path_var.set(filename)
             self.osm_file_path = filename
+            self._file_size_mb = None
             self.status_var.set(f"File selected: {Path(filename).name}")
     
     def load_osm_file(self):
@@ -210,33 +357,41 @@ class WorkingOSMGUI:
             messagebox.showerror("Error", "Please select an OSM file first")
             return
         
-        def load_in_thread():
-            try:
-                self.status_var.set("Loading OSM file...")
-                self.root.update()
-                
-                # Parse OSM file
-                self.osm_data = self.parser.parse_file(self.osm_file_path)
-                
-                # Update analysis
-                self.update_analysis()
-                
-                self.status_var.set(f"File loaded: {self.osm_data['total_elements']} elements")
-                
-            except Exception as e:
-                self.status_var.set("Error loading file")
-                messagebox.showerror("Error", f"Failed to load OSM file: {e}")
+        self.status_var.set("Loading OSM file...")
+        self._file_size_mb = None
         
-        # Run in thread to avoid blocking UI
-        thread = threading.Thread(target=load_in_thread)
-        thread.daemon = True
-        thread.start()
+        # The label's redraw is already queued as an idle task, so the
+        # status shows before the parse is handed off
+        self.root.after_idle(self._submit_load, self.osm_file_path)
+    
+    def _submit_load(self, osm_file_path: str):
+        """Start parsing a file on the parse executor."""
+        # The result comes back on the Tk thread through the UI queue
+        future = _get_executor().submit(self.parser.parse_file, osm_file_path)
+        future.add_done_callback(lambda f: self._ui_q.put((self._on_loaded, f)))
+    
+    def _on_loaded(self, future):
+        """Show the parse result once the parse worker has finished."""
+        try:
+            self.osm_data = future.result()
+        except Exception as e:
+            self.status_var.set("Error loading file")
+            messagebox.showerror("Error", f"Failed to load OSM file: {e}")
+            return
+        
+        # Update analysis
+        self.update_analysis()
+        
+        self.status_var.set(f"File loaded: {self.osm_data['total_elements']} elements")
     
     def update_analysis(self):
         """Update analysis display."""
         if not self.osm_data:
             return
         
+        if self._file_size_mb is None:
+            self._file_size_mb = Path(self.osm_file_path).stat().st_size / 1024 / 1024
+        
         analysis_text = f"""
 OSM File Analysis Report
 {'='*50}
@@ -253,7 +408,7 @@ OSM File Analysis Report
 
 📁 File Information:
 • File Path: {self.osm_file_path}
-• File Size: {Path(self.osm_file_path).stat().st_size / 1024 / 1024:.2f} MB
+• File Size: {self._file_size_mb:.2f} MB
 
 🔍 Data Quality:
 • Node/Way Ratio: {self.osm_data['nodes'] / max(self.osm_data['ways'], 1):.2f}
@@ -268,6 +423,7 @@ OSM File Analysis Report
 Analysis completed successfully!
 """
         
+        self._analysis_report = analysis_text
         self.analysis_text.delete(1.0, tk.END)
         self.analysis_text.insert(1.0, analysis_text)
     
@@ -293,7 +449,7 @@ Analysis completed successfully!
         if filename:
             try:
                 with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.analysis_text.get(1.0, tk.END))
+                    f.write(self._analysis_report)
                 messagebox.showinfo("Success", f"Analysis exported to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to export: {e}")
@@ -310,38 +466,57 @@ Analysis completed successfully!
             messagebox.showwarning("Warning", "No OSM data to export")
             return
         
+        export_dir = Path(self.export_dir_var.get())
+        osm_data = self.osm_data
+        report = self._analysis_report
+        
+        def write_json():
+            json_file = export_dir / "osm_analysis.json"
+            if orjson is not None:
+                with open(json_file, 'wb') as f:
+                    f.write(orjson.dumps(osm_data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump(osm_data, f, indent=2, ensure_ascii=False)
+            return f"✓ Exported JSON: {json_file}"
+        
+        def write_csv():
+            csv_file = export_dir / "osm_statistics.csv"
+            rows = (
+                ("Nodes", osm_data['nodes']),
+                ("Ways", osm_data['ways']),
+                ("Relations", osm_data['relations']),
+                ("Total Elements", osm_data['total_elements']),
+                ("Unique Tags", osm_data['unique_tags'])
+            )
+            with open(csv_file, 'w', encoding='utf-8') as f:
+                f.write("Metric,Value\n" + "".join(f"{metric},{value}\n" for metric, value in rows))
+            return f"✓ Exported CSV: {csv_file}"
+        
+        def write_txt():
+            txt_file = export_dir / "osm_analysis.txt"
+            with open(txt_file, 'w', encoding='utf-8') as f:
+                f.write(report)
+            return f"✓ Exported TXT: {txt_file}"
+        
+        # Selected formats are read here, on the Tk thread
+        writers = [writer for format_name, writer in (
+            ('json', write_json),
+            ('csv', write_csv),
+            ('txt', write_txt)
+        ) if self.export_formats[format_name].get()]
+        
         def export_in_thread():
             try:
-                export_dir = Path(self.export_dir_var.get())
                 export_dir.mkdir(parents=True, exist_ok=True)
                 
                 self.log_export(f"Starting export to {export_dir}")
                 
-                # Export JSON
-                if self.export_formats['json'].get():
-                    json_file = export_dir / "osm_analysis.json"
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(self.osm_data, f, indent=2, ensure_ascii=False)
-                    self.log_export(f"✓ Exported JSON: {json_file}")
-                
-                # Export CSV
-                if self.export_formats['csv'].get():
-                    csv_file = export_dir / "osm_statistics.csv"
-                    with open(csv_file, 'w', encoding='utf-8') as f:
-                        f.write("Metric,Value\n")
-                        f.write(f"Nodes,{self.osm_data['nodes']}\n")
-                        f.write(f"Ways,{self.osm_data['ways']}\n")
-                        f.write(f"Relations,{self.osm_data['relations']}\n")
-                        f.write(f"Total Elements,{self.osm_data['total_elements']}\n")
-                        f.write(f"Unique Tags,{self.osm_data['unique_tags']}\n")
-                    self.log_export(f"✓ Exported CSV: {csv_file}")
-                
-                # Export TXT
-                if self.export_formats['txt'].get():
-                    txt_file = export_dir / "osm_analysis.txt"
-                    with open(txt_file, 'w', encoding='utf-8') as f:
-                        f.write(self.analysis_text.get(1.0, tk.END))
-                    self.log_export(f"✓ Exported TXT: {txt_file}")
+                # The files are independent, so write them concurrently
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    futures = [executor.submit(writer) for writer in writers]
+                    for future in as_completed(futures):
+                        self.log_export(future.result())
                 
                 self.log_export("🎉 Export completed successfully!")
                 
@@ -357,10 +532,30 @@ Analysis completed successfully!
         thread.start()
     
     def log_export(self, message: str):
-        """Log export message."""
-        self.export_log.insert(tk.END, f"{message}\n")
-        self.export_log.see(tk.END)
-        self.root.update_idletasks()
+        """Log export message; safe to call from any thread."""
+        self._log_q.put(message)
+    
+    def _drain_queues(self):
+        """Apply queued UI callbacks and log lines on the Tk thread."""
+        # Reschedule first so a failing callback cannot stop the polling
+        self.root.after(UI_POLL_MS, self._drain_queues)
+        
+        while True:
+            try:
+                callback, arg = self._ui_q.get_nowait()
+            except queue.Empty:
+                break
+            callback(arg)
+        
+        messages = []
+        while True:
+            try:
+                messages.append(self._log_q.get_nowait())
+            except queue.Empty:
+                break
+        if messages:
+            self.export_log.insert(tk.END, "".join(f"{message}\n" for message in messages))
+            self.export_log.see(tk.END)
     
     def run(self):
         """Run the GUI application."""